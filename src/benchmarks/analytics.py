@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from clavierdor.analytics import load_statistics, refresh_statistics
+from clavierdor.orm import configure_database
+from clavierdor.services import GameService
+
+from .common import print_report
+from .loadgen import parse_scale, synthesize
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Mesure le calcul complet puis incrémental des statistiques"
+    )
+    parser.add_argument("--scale", default="1m", help="10k, 100k, 1m, 10m ou un nombre")
+    parser.add_argument(
+        "--increment", type=float, default=0.01, help="Part de nouvelles réponses"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scale = parse_scale(args.scale)
+    with tempfile.TemporaryDirectory() as directory:
+        configure_database(Path(directory) / "analytics.db")
+        GameService().close()
+        synthesize(scale, args.seed)
+        full = refresh_statistics(rebuild=True)
+        synthesize(max(1, int(scale * args.increment)), args.seed + 1)
+        incremental = refresh_statistics()
+        statistics = load_statistics()
+        configure_database(None)
+    report = {}
+    for name, refresh in (("full", full), ("incremental", incremental)):
+        report[name] = {
+            **asdict(refresh),
+            "rows_per_second": refresh.processed / refresh.seconds if refresh.seconds else 0.0,
+        }
+    report["questions"] = len(statistics.questions)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
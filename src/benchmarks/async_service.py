@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from clavierdor.async_service import AsyncGameService
+from clavierdor.models import RoleType
+from clavierdor.orm import ENGINE_PROFILES, configure_database
+from clavierdor.services import GameService, SessionState
+
+from .common import latency_summary, print_report
+from .loadgen import answer_key
+
+
+class ThreadedGameService:
+    def __init__(self, threads: int) -> None:
+        self._service = GameService()
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="bench-service")
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(getattr(self._service, method), *args)
+        )
+
+    async def start_new_game(self, name: str, role: RoleType) -> SessionState:
+        return await self._call("start_new_game", name, role)
+
+    async def submit_answer(
+        self, session_id: int, question_id: int, selected: str
+    ) -> SessionState:
+        return await self._call("submit_answer", session_id, question_id, selected)
+
+    async def close(self) -> None:
+        self._executor.shutdown()
+        self._service.close()
+
+
+async def _play(
+    service: Any,
+    player: int,
+    deadline: float,
+    think: float,
+    answers: dict[int, str],
+    samples: list[float],
+) -> None:
+    rng = random.Random(player)
+    role = rng.choice(list(RoleType))
+    await asyncio.sleep(rng.uniform(0, min(think, deadline - time.perf_counter())))
+    state = await service.start_new_game(f"bench-{player}", role)
+    while True:
+        pause = rng.expovariate(1 / think)
+        if time.perf_counter() + pause >= deadline:
+            return
+        await asyncio.sleep(pause)
+        question = state.current_question
+        if state.completed or question is None:
+            state = await service.start_new_game(f"bench-{player}", role)
+            continue
+        selected = answers[question.id] if rng.random() < 0.7 else "D"
+        started = time.perf_counter()
+        state = await service.submit_answer(state.session_id, question.id, selected)
+        samples.append(time.perf_counter() - started)
+
+
+async def _run(service: Any, players: int, duration: float, think: float) -> dict:
+    answers = answer_key()
+    samples: list[float] = []
+    peak_threads = threading.active_count()
+    deadline = time.perf_counter() + duration
+    tasks = [
+        asyncio.create_task(_play(service, index, deadline, think, answers, samples))
+        for index in range(players)
+    ]
+    started = time.perf_counter()
+    while not all(task.done() for task in tasks):
+        peak_threads = max(peak_threads, threading.active_count())
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    for task in tasks:
+        task.result()
+    await service.close()
+    return {
+        "answers": len(samples),
+        "answers_per_second": round(len(samples) / elapsed, 1),
+        "peak_threads": peak_threads,
+        "submit_answer": latency_summary(samples),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare le service asynchrone au service synchrone dans un pool de threads"
+    )
+    parser.add_argument("--players", type=int, default=1000, help="Joueurs connectés")
+    parser.add_argument("--duration", type=float, default=40.0)
+    parser.add_argument(
+        "--think", type=float, default=20.0, help="Temps de réflexion moyen (s) entre réponses"
+    )
+    parser.add_argument("--threads", type=int, default=32, help="Taille du pool de threads")
+    parser.add_argument("--engine-profile", choices=list(ENGINE_PROFILES), default="wal")
+    args = parser.parse_args(argv)
+
+    report: dict[str, Any] = {"players": args.players, "think_seconds": args.think}
+    for name in ("threaded", "async"):
+        with tempfile.TemporaryDirectory() as directory:
+            configure_database(Path(directory) / f"{name}.db", args.engine_profile)
+            if name == "async":
+                service: Any = AsyncGameService()
+            else:
+                service = ThreadedGameService(args.threads)
+            report[name] = asyncio.run(_run(service, args.players, args.duration, args.think))
+            configure_database(None)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
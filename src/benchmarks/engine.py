@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import argparse
+import platform
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import sqlalchemy
+
+from clavierdor.models import RoleType
+from clavierdor.orm import ENGINE_PROFILES, configure_database
+from clavierdor.services import GameService
+
+from .common import latency_summary, print_report
+
+
+def _answer_loop(
+    service: GameService,
+    names: list[str],
+    answers: int,
+    seed: int,
+    samples: list[float],
+    errors: list[str],
+) -> None:
+    rng = random.Random(seed)
+    states = {name: service.start_new_game(name, rng.choice(list(RoleType))) for name in names}
+    for turn in range(answers):
+        name = names[turn % len(names)]
+        state = states[name]
+        if state.completed or state.current_question is None:
+            state = states[name] = service.start_new_game(name, state.role)
+        question = state.current_question
+        selected = question.correct_choice if rng.random() < 0.7 else "Z"
+        started = time.perf_counter()
+        try:
+            states[name] = service.submit_answer(state.session_id, question.id, selected)
+        except Exception as exc:  # noqa: BLE001
+            errors.append(f"{type(exc).__name__}: {exc}")
+        samples.append(time.perf_counter() - started)
+
+
+def _read_loop(service: GameService, stop: threading.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        service.leaderboard(10)
+        samples.append(time.perf_counter() - started)
+
+
+def run_profile(
+    profile: str, directory: Path, writers: int, players: int, answers: int, seed: int
+) -> dict[str, Any]:
+    configure_database(directory / f"{profile}.db", profile)
+    service = GameService()
+    write_samples: list[float] = []
+    read_samples: list[float] = []
+    errors: list[str] = []
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=_answer_loop,
+            args=(
+                service,
+                [f"joueur-{writer}-{index}" for index in range(players)],
+                answers,
+                seed + writer,
+                write_samples,
+                errors,
+            ),
+        )
+        for writer in range(writers)
+    ]
+    reader = threading.Thread(target=_read_loop, args=(service, stop, read_samples))
+    started = time.perf_counter()
+    reader.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    reader.join()
+    service.close()
+    configure_database(None)
+    return {
+        "answers_per_second": len(write_samples) / elapsed if elapsed else 0.0,
+        "submit_answer": latency_summary(write_samples),
+        "leaderboard_during_writes": latency_summary(read_samples),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare les profils de moteur SQLite sur la soumission de réponses"
+    )
+    parser.add_argument(
+        "--profiles", nargs="+", choices=list(ENGINE_PROFILES), default=list(ENGINE_PROFILES)
+    )
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--players", type=int, default=5, help="Joueurs par thread")
+    parser.add_argument("--answers", type=int, default=250, help="Réponses par thread")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            profile: run_profile(
+                profile, Path(directory), args.writers, args.players, args.answers, args.seed
+            )
+            for profile in args.profiles
+        }
+    print_report(
+        {
+            "environment": {
+                "python": platform.python_version(),
+                "sqlalchemy": sqlalchemy.__version__,
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+            },
+            "writers": args.writers,
+            "answers": args.writers * args.answers,
+            "profiles": results,
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
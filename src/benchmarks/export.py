@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+from .common import print_report
+
+
+def synthetic_scores(rows: int) -> Iterator[tuple[str, int, datetime]]:
+    start = datetime(2024, 1, 1)
+    for index in range(rows):
+        yield f"joueur-{index % 5000}", (rows - index) % 100, start + timedelta(minutes=index)
+
+
+def database_scores(rows: int) -> Iterator[tuple[str, int, datetime]]:
+    from clavierdor.services import GameService
+
+    return islice(GameService().iter_scores(), rows)
+
+
+def _measure(fmt: str, rows: int, source: str, directory: str) -> dict:
+    from clavierdor.exports import export_scores
+
+    scores = database_scores(rows) if source == "db" else synthetic_scores(rows)
+    path = Path(directory) / f"scores.{fmt}"
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    export_scores(path, scores, fmt)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "format": fmt,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed) if elapsed else None,
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "rss_growth_mb": round((peak_kb - baseline_kb) / 1024, 1),
+        "file_mb": round(path.stat().st_size / 1024 / 1024, 2),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Débit et mémoire des exports de scores")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "jsonl", "pdf"])
+    parser.add_argument("--source", choices=["synthetic", "db"], default="synthetic")
+    args = parser.parse_args(argv)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in args.formats:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.append(
+                    pool.submit(_measure, fmt, args.rows, args.source, directory).result()
+                )
+    print_report({"exports": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from clavierdor.data import import_question_file, seed_questions
+from clavierdor.orm import configure_database, init_db
+
+from .common import print_report
+
+FIELDS = [
+    "prompt",
+    "choice_a",
+    "choice_b",
+    "choice_c",
+    "choice_d",
+    "correct_choice",
+    "stage",
+    "hint",
+]
+
+
+def synthetic_questions(count: int, seed: int = 0, revision: float = 0.0) -> list[dict]:
+    rng = random.Random(seed)
+    questions = []
+    for index in range(count):
+        correct_choice = "ABCD"[index % 4]
+        if revision and rng.random() < revision:
+            correct_choice = "ABCD"[(index + 1) % 4]
+        total = index + index % 97
+        questions.append(
+            {
+                "prompt": f"Question n°{index} : combien font {index} + {index % 97} ?",
+                "choice_a": str(total),
+                "choice_b": str(total + 1),
+                "choice_c": str(total + 2),
+                "choice_d": str(total + 3),
+                "correct_choice": correct_choice,
+                "stage": index % 4 + 1,
+                "hint": "Additionnez les deux nombres.",
+            }
+        )
+    return questions
+
+
+def write_questions(path: Path, questions: list[dict]) -> Path:
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        if path.suffix == ".csv":
+            writer = csv.DictWriter(handle, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(questions)
+        elif path.suffix == ".jsonl":
+            for question in questions:
+                handle.write(json.dumps(question, ensure_ascii=False) + "\n")
+        else:
+            json.dump(questions, handle, ensure_ascii=False)
+    return path
+
+
+def _run(label: str, path: Path, near_duplicates: bool = False) -> dict:
+    report = import_question_file(path, near_duplicates=near_duplicates)
+    return {
+        "pass": label,
+        "file": path.name,
+        "rows": report.read,
+        "inserted": report.inserted,
+        "updated": report.updated,
+        "unchanged": report.unchanged,
+        "near_duplicates": report.near_duplicates,
+        "seconds": round(report.seconds, 3),
+        "rows_per_s": round(report.rows_per_second),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Débit de l'import de banques de questions")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--formats", nargs="+", default=["jsonl", "csv", "json"])
+    parser.add_argument(
+        "--near-duplicates", action="store_true", help="Active la détection des quasi-doublons"
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in args.formats:
+            configure_database(Path(directory) / f"import-{fmt}.db")
+            init_db(seed_questions)
+            initial = write_questions(
+                Path(directory) / f"bank.{fmt}", synthetic_questions(args.rows)
+            )
+            revised = write_questions(
+                Path(directory) / f"bank-revised.{fmt}",
+                synthetic_questions(args.rows, revision=0.01),
+            )
+            results.append(_run("initial", initial, args.near_duplicates))
+            results.append(_run("re-import", initial, args.near_duplicates))
+            results.append(_run("1% modifié", revised, args.near_duplicates))
+        configure_database(None)
+    print_report({"imports": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from sqlalchemy import Connection, Executable, func, select, text
+
+from clavierdor.models import AnswerLog, GameSession, Player, Question, RoleType
+from clavierdor.orm import BACKFILL_PLAYER_BEST_SCORES, get_engine
+from clavierdor.write_behind import period_best_rows, period_best_upsert
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+ANSWERS_PER_SESSION = 5
+SESSIONS_PER_PLAYER = 40
+BATCH_SIZE = 20_000
+STAGE_MAX = 4
+
+_INSERT_PLAYER = "INSERT INTO players (id, name, role, created_at) VALUES (?, ?, ?, ?)"
+_INSERT_SESSION = (
+    "INSERT INTO game_sessions (id, player_id, started_at, completed, stage, score, streak, "
+    "front_joker_used, back_joker_used, mobile_joker_used, deck_seed, deck_offset, "
+    "correct_answers, total_answers) VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, 0, ?, 0, ?, ?)"
+)
+_INSERT_ANSWER = (
+    "INSERT INTO answer_logs (id, session_id, question_id, selected, is_correct, answered_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def parse_scale(value: str) -> int:
+    return SCALES.get(value.lower()) or int(value)
+
+
+def answer_key() -> dict[int, str]:
+    with get_engine().connect() as connection:
+        return dict(connection.execute(select(Question.id, Question.correct_choice)).tuples().all())
+
+
+def _sql_datetime(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _next_id(connection: Connection, column) -> int:
+    return (connection.scalar(select(func.max(column))) or 0) + 1
+
+
+def _batched_execute(
+    connection: Connection, sql: str | Executable, rows: Iterator[tuple] | Iterator[dict]
+) -> None:
+    execute = connection.exec_driver_sql if isinstance(sql, str) else connection.execute
+    batch: list = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            execute(sql, batch)
+            batch = []
+    if batch:
+        execute(sql, batch)
+
+
+def _period_best_scores(sessions: list[tuple]) -> Iterator[dict]:
+    for session_id, player_id, started_at, _, _, score, *_ in sessions:
+        best = {
+            "player_id": player_id,
+            "session_id": session_id,
+            "score": score,
+            "started_at": datetime.fromisoformat(started_at),
+        }
+        yield from period_best_rows([best])
+
+
+def synthesize(answer_rows: int, seed: int = 0) -> dict[str, int]:
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    session_count = max(1, answer_rows // ANSWERS_PER_SESSION)
+    player_count = max(1, session_count // SESSIONS_PER_PLAYER)
+    epoch = datetime(2024, 1, 1)
+    with get_engine().begin() as connection:
+        questions: dict[int, list[tuple[int, str]]] = {}
+        for question_id, stage, correct in connection.execute(
+            select(Question.id, Question.stage, Question.correct_choice)
+        ):
+            questions.setdefault(stage, []).append((question_id, correct))
+        first_player = _next_id(connection, Player.id)
+        first_session = _next_id(connection, GameSession.id)
+        first_answer = _next_id(connection, AnswerLog.id)
+        roles = [role.name for role in RoleType]
+
+        _batched_execute(
+            connection,
+            _INSERT_PLAYER,
+            (
+                (
+                    first_player + index,
+                    f"synth-{first_player + index}",
+                    roles[index % 3],
+                    _sql_datetime(epoch),
+                )
+                for index in range(player_count)
+            ),
+        )
+
+        sessions: list[tuple] = []
+        answer_id = first_answer
+
+        def answers() -> Iterator[tuple]:
+            nonlocal answer_id
+            for offset in range(session_count):
+                session_id = first_session + offset
+                started_at = epoch + timedelta(seconds=offset * 37)
+                stage, score, streak, correct_answers = 1, 0, 0, 0
+                completed = False
+                for answer in range(ANSWERS_PER_SESSION):
+                    question_id, correct_choice = rng.choice(questions[stage])
+                    is_correct = rng.random() < 0.6
+                    if is_correct:
+                        streak += 1
+                        score += 15 if streak >= 3 else 10
+                        correct_answers += 1
+                        if stage < STAGE_MAX:
+                            stage += 1
+                        else:
+                            completed = True
+                    else:
+                        streak = 0
+                    selected = correct_choice if is_correct else "Z"
+                    answered_at = _sql_datetime(started_at + timedelta(seconds=answer * 5))
+                    yield answer_id, session_id, question_id, selected, is_correct, answered_at
+                    answer_id += 1
+                    if completed:
+                        break
+                sessions.append(
+                    (
+                        session_id,
+                        first_player + offset % player_count,
+                        _sql_datetime(started_at),
+                        completed,
+                        stage,
+                        score,
+                        streak,
+                        rng.getrandbits(31),
+                        correct_answers,
+                        answer + 1,
+                    )
+                )
+
+        _batched_execute(connection, _INSERT_ANSWER, answers())
+        _batched_execute(connection, _INSERT_SESSION, iter(sessions))
+        connection.execute(text(BACKFILL_PLAYER_BEST_SCORES))
+        _batched_execute(connection, period_best_upsert(), _period_best_scores(sessions))
+    return {
+        "players": player_count,
+        "sessions": session_count,
+        "answers": answer_id - first_answer,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def table_counts() -> dict[str, int]:
+    with get_engine().connect() as connection:
+        return {
+            "players": connection.scalar(select(func.count(Player.id))),
+            "sessions": connection.scalar(select(func.count(GameSession.id))),
+            "answers": connection.scalar(select(func.count(AnswerLog.id))),
+        }
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import tempfile
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from clavierdor.models import RoleType
+from clavierdor.orm import configure_database
+from clavierdor.services import GameService, SessionState
+from clavierdor.session_cache import SessionStateCache
+
+from .common import print_report
+
+
+def _held_bytes(build: Callable[[], Any]) -> tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return held, allocated
+
+
+@dataclass
+class _PlainQuestionView:
+    id: int
+    prompt: str
+    choices: dict[str, str]
+    correct_choice: str
+    hint: str
+    stage: int
+
+
+@dataclass
+class _PlainSessionState:
+    session_id: int
+    player_name: str
+    role: RoleType
+    stage: int
+    score: int
+    streak: int
+    correct_answers: int
+    total_answers: int
+    accuracy: float
+    current_question: _PlainQuestionView | None
+    completed: bool
+    perk_used: bool
+
+
+def _unshared(state: SessionState) -> _PlainSessionState:
+    values = {name: getattr(state, name) for name in state.__slots__}
+    view = state.current_question
+    if view is not None:
+        values["current_question"] = _PlainQuestionView(
+            view.id, view.prompt, dict(view.choices), view.correct_choice, view.hint, view.stage
+        )
+    return _PlainSessionState(**values)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Empreinte mémoire des parties gardées en mémoire par le serveur"
+    )
+    parser.add_argument("--sessions", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure_database(Path(directory) / "memory.db", "unsafe")
+        service = GameService(state_cache=SessionStateCache(args.sessions))
+        roles = list(RoleType)
+        session_ids = [
+            service.start_new_game(f"joueur-{index}", roles[index % len(roles)]).session_id
+            for index in range(args.sessions)
+        ]
+        states, shared_bytes = _held_bytes(
+            lambda: [service.get_state(session_id) for session_id in session_ids]
+        )
+        _, unshared_bytes = _held_bytes(lambda: [_unshared(state) for state in states])
+        views = {id(state.current_question) for state in states if state.current_question}
+        stats = service.cache_stats()
+        service.close()
+        configure_database(None)
+
+    print_report(
+        {
+            "sessions": args.sessions,
+            "distinct_question_views": len(views),
+            "bytes_per_session": round(shared_bytes / args.sessions, 1),
+            "bytes_per_session_unshared": round(unshared_bytes / args.sessions, 1),
+            "state_cache": asdict(stats),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import Connection, Select, select
+
+from clavierdor.core import history_query, last_answer_query
+from clavierdor.data import seed_questions
+from clavierdor.models import LeaderboardWindow, Question
+from clavierdor.orm import configure_database, explain_query_plan, get_engine, init_db
+from clavierdor.services import LeaderboardCursor, leaderboard_query, scores_query
+
+HOT_QUERIES: dict[str, tuple[Select, str]] = {
+    "resume_last_game": (history_query(1).limit(1), "ix_game_sessions_player_started"),
+    "list_history": (history_query(1), "ix_game_sessions_player_started"),
+    "use_back_joker": (last_answer_query(1), "ix_answer_logs_session_answered"),
+    "list_scores": (scores_query(), "ix_game_sessions_score"),
+    "leaderboard": (leaderboard_query(10), "ix_player_best_scores_rank"),
+    "leaderboard_page": (
+        leaderboard_query(10, LeaderboardCursor(50, datetime(2024, 1, 1), 1)),
+        "ix_player_best_scores_rank",
+    ),
+    "leaderboard_week": (
+        leaderboard_query(10, None, LeaderboardWindow.WEEK, "2024-01-01"),
+        "ix_period_best_scores_rank",
+    ),
+    "leaderboard_week_page": (
+        leaderboard_query(
+            10, LeaderboardCursor(50, datetime(2024, 1, 1), 1), LeaderboardWindow.WEEK, "2024-01-01"
+        ),
+        "ix_period_best_scores_rank",
+    ),
+    "questions_by_stage": (select(Question).where(Question.stage == 1), "ix_questions_stage"),
+}
+
+
+def plan_failures(
+    connection: Connection, name: str, statement: Select, index_name: str
+) -> list[str]:
+    failures = []
+    plan = explain_query_plan(connection, statement)
+    if not any(index_name in step for step in plan):
+        failures.append(f"{name}: {index_name} absent du plan {plan}")
+    if any("USE TEMP B-TREE" in step for step in plan):
+        failures.append(f"{name}: tri temporaire {plan}")
+    return failures
+
+
+def check_query_plans() -> list[str]:
+    init_db(seed_questions)
+    with get_engine().connect() as connection:
+        return [
+            failure
+            for name, (statement, index_name) in HOT_QUERIES.items()
+            for failure in plan_failures(connection, name, statement, index_name)
+        ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Vérifie que les requêtes critiques utilisent leurs index"
+    )
+    parser.add_argument("--db", help="Base SQLite à vérifier ; sinon une base temporaire")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as directory:
+        configure_database(args.db or Path(directory) / "query_plans.db")
+        try:
+            failures = check_query_plans()
+        finally:
+            configure_database(None)
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+    print(f"{len(HOT_QUERIES)} requêtes critiques utilisent leurs index.")
+
+
+if __name__ == "__main__":
+    main()
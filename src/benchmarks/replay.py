@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from clavierdor.orm import configure_database
+from clavierdor.replay import REPLAY_RANGE_SIZE, replay_sessions
+from clavierdor.services import GameService
+
+from .common import print_report
+from .loadgen import parse_scale, synthesize
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Mesure le rejeu des réponses selon le nombre de processus"
+    )
+    parser.add_argument("--scale", default="1m", help="10k, 100k, 1m, 10m ou un nombre")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--range-size", type=int, default=REPLAY_RANGE_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scale = parse_scale(args.scale)
+    report = {}
+    with tempfile.TemporaryDirectory() as directory:
+        configure_database(Path(directory) / "replay.db", "unsafe")
+        GameService().close()
+        report["synthesized"] = synthesize(scale, args.seed)
+        for workers in args.workers:
+            replay = replay_sessions(workers, args.range_size)
+            report[f"workers_{workers}"] = {
+                "sessions": replay.sessions,
+                "answers": replay.answers,
+                "drifted": replay.drifted,
+                "seconds": round(replay.seconds, 2),
+                "answers_per_second": round(replay.answers_per_second),
+            }
+        configure_database(None)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
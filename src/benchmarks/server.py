@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from urllib.request import Request, urlopen
+
+from clavierdor.models import RoleType
+from clavierdor.server import GameServer
+from clavierdor.services import GameService
+from clavierdor.write_behind import Durability, WriteBehindLog
+
+from .common import latency_summary, print_report
+from .loadgen import answer_key
+
+TARGET_SUBMIT_RPS = 200.0
+TARGET_SUBMIT_P99_MS = 50.0
+
+
+def _post(base_url: str, path: str, payload: dict) -> dict:
+    request = Request(
+        f"{base_url}{path}",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def _play(
+    base_url: str, player: int, deadline: float, answers: dict[int, str], samples: list[float]
+) -> None:
+    rng = random.Random(player)
+    role = rng.choice(list(RoleType)).value
+    state = _post(base_url, "/games", {"name": f"bench-{player}", "role": role})
+    while time.perf_counter() < deadline:
+        question = state["current_question"]
+        if state["completed"] or question is None:
+            state = _post(base_url, "/games", {"name": f"bench-{player}", "role": role})
+            continue
+        correct = answers.get(question["id"]) or rng.choice(sorted(question["choices"]))
+        selected = correct if rng.random() < 0.7 else "D"
+        started = time.perf_counter()
+        state = _post(
+            base_url,
+            f"/games/{state['session_id']}/answer",
+            {"question_id": question["id"], "selected": selected},
+        )
+        samples.append(time.perf_counter() - started)
+
+
+def run(base_url: str, players: int, duration: float) -> dict:
+    answers = answer_key()
+    per_player: list[list[float]] = [[] for _ in range(players)]
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_play, args=(base_url, index, deadline, answers, per_player[index]))
+        for index in range(players)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    samples = [sample for player_samples in per_player for sample in player_samples]
+    summary = latency_summary(samples)
+    rps = len(samples) / elapsed if elapsed else 0.0
+    return {
+        "players": players,
+        "duration_s": round(elapsed, 2),
+        "submit_answer": {**summary, "rps": rps},
+        "targets": {
+            "rps": TARGET_SUBMIT_RPS,
+            "p99_ms": TARGET_SUBMIT_P99_MS,
+            "met": rps >= TARGET_SUBMIT_RPS and summary["p99_ms"] <= TARGET_SUBMIT_P99_MS,
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Débit et latence p99 de submit_answer via HTTP")
+    parser.add_argument("--url", help="Serveur existant ; sinon un serveur local est démarré")
+    parser.add_argument("--players", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument(
+        "--durability", choices=[item.value for item in Durability], default="buffered"
+    )
+    args = parser.parse_args(argv)
+
+    if args.url:
+        print_report(run(args.url.rstrip("/"), args.players, args.duration))
+        return
+    write_behind = None
+    if args.write_behind:
+        write_behind = WriteBehindLog(durability=Durability(args.durability))
+    service = GameService(write_behind=write_behind)
+    with GameServer(("127.0.0.1", 0), service, workers=args.workers) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            print_report(run(f"http://127.0.0.1:{server.server_port}", args.players, args.duration))
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+import sqlalchemy
+
+from clavierdor.models import RoleType
+from clavierdor.orm import configure_database, enable_query_profiling
+from clavierdor.services import GameService
+
+from .common import latency_summary, print_report
+from .loadgen import parse_scale, synthesize, table_counts
+
+REGRESSION_METRIC = "p95_ms"
+QUERY_BUDGETS = {
+    "start_new_game": 8,
+    "resume_last_game": 2,
+    "submit_answer": 5,
+    "use_front_joker": 3,
+    "use_back_joker": 5,
+    "use_mobile_joker": 3,
+    "list_history": 2,
+    "leaderboard": 1,
+    "list_scores": 1,
+}
+
+
+class MethodTimer:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+
+    def call(self, name: str, method: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        result = method(*args)
+        self.samples.setdefault(name, []).append(time.perf_counter() - started)
+        return result
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {name: latency_summary(samples) for name, samples in sorted(self.samples.items())}
+
+
+def play_game(service: GameService, timer: MethodTimer, name: str, rng: random.Random) -> None:
+    role = rng.choice(list(RoleType))
+    state = timer.call("start_new_game", service.start_new_game, name, role)
+    joker_turn = rng.randrange(4)
+    for turn in range(12):
+        if state.completed or state.current_question is None:
+            break
+        if turn == joker_turn:
+            if role is RoleType.FRONT:
+                state = timer.call(
+                    "use_front_joker",
+                    service.use_front_joker,
+                    state.session_id,
+                    state.current_question.id,
+                )
+                continue
+            if role is RoleType.MOBILE:
+                timer.call("use_mobile_joker", service.use_mobile_joker, state.session_id)
+        question = state.current_question
+        selected = question.correct_choice if rng.random() < 0.7 else "Z"
+        state = timer.call(
+            "submit_answer", service.submit_answer, state.session_id, question.id, selected
+        )
+        if turn == joker_turn and role is RoleType.BACK:
+            state = timer.call("use_back_joker", service.use_back_joker, state.session_id)
+    timer.call("resume_last_game", service.resume_last_game, name)
+
+
+def run(games: int, players: int, read_repeats: int, seed: int) -> dict[str, Any]:
+    rng = random.Random(seed)
+    service = GameService()
+    timer = MethodTimer()
+    names = [f"simu-{index}" for index in range(players)]
+    for _ in range(games):
+        play_game(service, timer, rng.choice(names), rng)
+    for _ in range(read_repeats):
+        timer.call("list_history", service.list_history, rng.choice(names))
+        timer.call("leaderboard", service.leaderboard, 10)
+        timer.call("list_scores", service.list_scores)
+    service.close()
+    return {"methods": timer.summary(), "state_cache": asdict(service.cache_stats())}
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    regressions = []
+    for name, stats in current["methods"].items():
+        previous = baseline.get("methods", {}).get(name)
+        if not previous or not previous.get(REGRESSION_METRIC):
+            continue
+        ratio = stats[REGRESSION_METRIC] / previous[REGRESSION_METRIC]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name} : {REGRESSION_METRIC} {previous[REGRESSION_METRIC]:.2f} → "
+                f"{stats[REGRESSION_METRIC]:.2f} ms (x{ratio:.2f})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Charge synthétique et latences de GameService")
+    parser.add_argument(
+        "--scale", default="10k", help="10k, 100k, 1m, 10m ou un nombre de réponses"
+    )
+    parser.add_argument(
+        "--db", type=Path, help="Base à utiliser (réutilisée si elle est déjà peuplée)"
+    )
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--read-repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Écrit le rapport JSON dans ce fichier")
+    parser.add_argument("--baseline", type=Path, help="Rapport JSON précédent à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--profile", action="store_true", help="Compte les requêtes SQL par méthode"
+    )
+    args = parser.parse_args(argv)
+
+    scale = parse_scale(args.scale)
+    db_path = args.db or Path.home() / ".clavierdor" / f"bench-{args.scale}.db"
+    configure_database(db_path)
+    GameService().close()
+    synthesized = None
+    if table_counts()["answers"] < scale:
+        synthesized = synthesize(scale - table_counts()["answers"], args.seed)
+    profiler = enable_query_profiling() if args.profile else None
+
+    report = {
+        "scale": scale,
+        "environment": {
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+        },
+        "rows": table_counts(),
+        "synthesized": synthesized,
+        **run(args.games, args.players, args.read_repeats, args.seed),
+    }
+    over_budget = []
+    if profiler is not None:
+        report["queries"] = profiler.report()
+        over_budget = profiler.check_budgets(QUERY_BUDGETS)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False))
+    print_report(report)
+    regressions = []
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+    for regression in regressions:
+        print(f"Régression : {regression}")
+    for failure in over_budget:
+        print(f"Budget de requêtes dépassé : {failure}")
+    if regressions or over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .common import print_report
+
+IMPORT_BUDGETS_MS = {
+    "clavierdor": 5.0,
+    "clavierdor.services": 150.0,
+    "clavierdor.server": 170.0,
+}
+OWN_PACKAGE = "clavierdor"
+FORBIDDEN_MODULES = ("fpdf", "tkinter")
+SERVICE_START_BUDGET_MS = 100.0
+
+_SERVICE_START = """
+import time
+started = time.perf_counter()
+from clavierdor.services import GameService
+imported = time.perf_counter()
+GameService()
+print((imported - started) * 1000, (time.perf_counter() - imported) * 1000)
+"""
+
+_BANK_LOAD = """
+import sys, time
+from pathlib import Path
+from clavierdor.core import GameCore
+snapshot = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+core = GameCore(question_snapshot=snapshot)
+started = time.perf_counter()
+core.ensure_questions_loaded()
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _src_env(db_path: Path | None = None) -> dict[str, str]:
+    env = dict(os.environ)
+    src = str(Path(__file__).resolve().parents[1])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    if db_path is not None:
+        env["CLAVIERDOR_DB"] = str(db_path)
+    return env
+
+
+def import_time(module: str) -> dict:
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=_src_env(),
+        check=True,
+    )
+    cumulative_us = own_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line.split(":", 1)[1].split("|")
+        name = name.strip()
+        if name == module:
+            cumulative_us = int(cumulative)
+        if name == OWN_PACKAGE or name.startswith(f"{OWN_PACKAGE}."):
+            own_us += int(own)
+    return {
+        "module": module,
+        "cumulative_ms": cumulative_us / 1000,
+        "own_ms": own_us / 1000,
+        "budget_ms": IMPORT_BUDGETS_MS[module],
+        "forbidden_loaded": [name for name in completed.stdout.strip().split(",") if name],
+    }
+
+
+def service_start(runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "startup.db"
+        env = _src_env(db_path)
+        timings = []
+        for _ in range(runs + 1):
+            completed = subprocess.run(
+                [sys.executable, "-c", _SERVICE_START],
+                capture_output=True,
+                text=True,
+                env=env,
+                check=True,
+            )
+            import_ms, init_ms = map(float, completed.stdout.split())
+            timings.append((import_ms, init_ms))
+    warm_imports = sorted(import_ms for import_ms, _ in timings[1:])
+    warm_inits = sorted(init_ms for _, init_ms in timings[1:])
+    return {
+        "first_init_ms": timings[0][1],
+        "warm_import_median_ms": warm_imports[len(warm_imports) // 2],
+        "warm_init_median_ms": warm_inits[len(warm_inits) // 2],
+        "budget_ms": SERVICE_START_BUDGET_MS,
+    }
+
+
+def _fill_bank(questions: int) -> None:
+    from sqlalchemy import insert
+
+    from clavierdor.models import Question
+    from clavierdor.orm import get_engine, init_db
+
+    init_db()
+    rows = [
+        {
+            "stage": index % 4 + 1,
+            "prompt": f"Question générée numéro {index} : quel raccourci clavier convient ?",
+            "choice_a": f"Ctrl+{index % 26}",
+            "choice_b": f"Alt+{index % 26}",
+            "choice_c": f"Maj+{index % 26}",
+            "choice_d": f"Cmd+{index % 26}",
+            "correct_choice": "ABCD"[index % 4],
+            "hint": f"Indice {index}",
+        }
+        for index in range(questions)
+    ]
+    with get_engine().begin() as connection:
+        connection.execute(insert(Question), rows)
+
+
+def bank_load(questions: int, runs: int) -> dict:
+    from clavierdor.orm import configure_database
+    from clavierdor.snapshot import build_snapshot, default_snapshot_path
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "bank.db"
+        configure_database(db_path)
+        _fill_bank(questions)
+        snapshot = build_snapshot(default_snapshot_path())
+        snapshot_bytes = snapshot.path.stat().st_size
+        snapshot.close()
+        configure_database(None)
+        env = _src_env(db_path)
+        timings: dict[str, list[float]] = {"orm": [], "snapshot": []}
+        for _ in range(runs):
+            for mode, extra in (("orm", []), ("snapshot", [str(snapshot.path)])):
+                completed = subprocess.run(
+                    [sys.executable, "-c", _BANK_LOAD, *extra],
+                    capture_output=True,
+                    text=True,
+                    env=env,
+                    check=True,
+                )
+                timings[mode].append(float(completed.stdout))
+    medians = {mode: sorted(values)[len(values) // 2] for mode, values in timings.items()}
+    return {
+        "questions": questions,
+        "snapshot_bytes": snapshot_bytes,
+        "orm_load_median_ms": medians["orm"],
+        "snapshot_load_median_ms": medians["snapshot"],
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Temps de démarrage à froid (python -X importtime)"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--questions",
+        type=int,
+        help="Compare le chargement ORM et l'instantané mmap sur une banque de N questions",
+    )
+    args = parser.parse_args(argv)
+    if args.questions:
+        print_report({"question_bank": bank_load(args.questions, args.runs)})
+        return
+
+    imports = [import_time(module) for module in IMPORT_BUDGETS_MS]
+    start = service_start(args.runs)
+    within_budget = start["warm_init_median_ms"] <= start["budget_ms"] and all(
+        item["own_ms"] <= item["budget_ms"] and not item["forbidden_loaded"]
+        for item in imports
+    )
+    print_report({"imports": imports, "service_start": start, "within_budget": within_budget})
+    if not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
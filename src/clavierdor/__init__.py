@@ -1,3 +1,7 @@
-from .gui import run
+def run() -> None:
+    from .gui import run as run_gui
+
+    run_gui()
+
 
 __all__ = ["run"]
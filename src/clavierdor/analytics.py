@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Collection
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import (
+    Connection,
+    Integer,
+    Select,
+    String,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import (
+    AnswerLog,
+    GameSession,
+    GroupStat,
+    JokerStat,
+    Player,
+    Question,
+    QuestionStat,
+    StatsWatermark,
+    utc_now,
+)
+from .orm import ENGINE_PROFILES, configure_database, get_engine, init_db
+
+ANSWERS_WATERMARK = "answers"
+JOKER_COLUMNS = {
+    "front": GameSession.front_joker_used,
+    "back": GameSession.back_joker_used,
+    "mobile": GameSession.mobile_joker_used,
+}
+
+
+@dataclass
+class AccuracyStat:
+    key: str
+    attempts: int
+    correct: int
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.attempts if self.attempts else 0.0
+
+    @property
+    def difficulty(self) -> float:
+        return 1 - (self.correct + 1) / (self.attempts + 2)
+
+
+@dataclass
+class JokerEffect:
+    joker: str
+    used: bool
+    sessions: int
+    completed: int
+    total_score: int
+    attempts: int
+    correct: int
+
+    @property
+    def completion_rate(self) -> float:
+        return self.completed / self.sessions if self.sessions else 0.0
+
+    @property
+    def average_score(self) -> float:
+        return self.total_score / self.sessions if self.sessions else 0.0
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.attempts if self.attempts else 0.0
+
+
+@dataclass
+class RefreshReport:
+    processed: int
+    last_answer_id: int
+    rebuilt: bool
+    seconds: float
+
+
+@dataclass
+class AnalyticsReport:
+    questions: list[AccuracyStat]
+    stages: list[AccuracyStat]
+    roles: list[AccuracyStat]
+    jokers: list[JokerEffect]
+    last_answer_id: int
+    refreshed_at: datetime | None
+
+
+def _answer_counts(*keys: Any) -> Select:
+    return select(
+        *keys,
+        func.count(AnswerLog.id),
+        func.sum(cast(AnswerLog.is_correct, Integer)),
+    )
+
+
+def _upsert_counts(connection: Connection, model: type, keys: list[str], source: Select) -> None:
+    statement = sqlite_insert(model).from_select([*keys, "attempts", "correct"], source)
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            "attempts": model.attempts + statement.excluded.attempts,
+            "correct": model.correct + statement.excluded.correct,
+        },
+    )
+    connection.execute(statement)
+
+
+def _aggregate_answers(connection: Connection, after_id: int, until_id: int) -> None:
+    window = (AnswerLog.id > after_id) & (AnswerLog.id <= until_id)
+    _upsert_counts(
+        connection,
+        QuestionStat,
+        ["question_id"],
+        _answer_counts(AnswerLog.question_id).where(window).group_by(AnswerLog.question_id),
+    )
+    _upsert_counts(
+        connection,
+        GroupStat,
+        ["dimension", "key"],
+        _answer_counts(literal("stage"), cast(Question.stage, String))
+        .join(Question, Question.id == AnswerLog.question_id)
+        .where(window)
+        .group_by(Question.stage),
+    )
+    _upsert_counts(
+        connection,
+        GroupStat,
+        ["dimension", "key"],
+        _answer_counts(literal("role"), Player.role)
+        .join(GameSession, GameSession.id == AnswerLog.session_id)
+        .join(Player, Player.id == GameSession.player_id)
+        .where(window)
+        .group_by(Player.role),
+    )
+
+
+def _aggregate_jokers(connection: Connection) -> None:
+    connection.execute(delete(JokerStat))
+    for joker, column in JOKER_COLUMNS.items():
+        used = func.coalesce(column, False)
+        connection.execute(
+            sqlite_insert(JokerStat).from_select(
+                ["joker", "used", "sessions", "completed", "total_score", "attempts", "correct"],
+                select(
+                    literal(joker),
+                    used,
+                    func.count(GameSession.id),
+                    func.sum(cast(GameSession.completed, Integer)),
+                    func.sum(GameSession.score),
+                    func.sum(GameSession.total_answers),
+                    func.sum(GameSession.correct_answers),
+                ).group_by(used),
+            )
+        )
+
+
+def _watermark_query() -> Select:
+    return select(StatsWatermark.last_answer_id).where(StatsWatermark.name == ANSWERS_WATERMARK)
+
+
+def refresh_statistics(rebuild: bool = False) -> RefreshReport:
+    started = time.perf_counter()
+    with get_engine().begin() as connection:
+        if rebuild:
+            connection.execute(delete(QuestionStat))
+            connection.execute(delete(GroupStat))
+            connection.execute(delete(StatsWatermark))
+        last_id = connection.scalar(_watermark_query()) or 0
+        high_id, processed = connection.execute(
+            select(func.max(AnswerLog.id), func.count(AnswerLog.id)).where(
+                AnswerLog.id > last_id
+            )
+        ).one()
+        if high_id is not None:
+            _aggregate_answers(connection, last_id, high_id)
+            last_id = high_id
+        _aggregate_jokers(connection)
+        upsert = sqlite_insert(StatsWatermark).values(
+            name=ANSWERS_WATERMARK, last_answer_id=last_id, refreshed_at=utc_now()
+        )
+        connection.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[StatsWatermark.name],
+                set_={
+                    "last_answer_id": upsert.excluded.last_answer_id,
+                    "refreshed_at": upsert.excluded.refreshed_at,
+                },
+            )
+        )
+    return RefreshReport(processed, last_id, rebuild, time.perf_counter() - started)
+
+
+def stats_version() -> int:
+    with get_engine().connect() as connection:
+        return connection.scalar(_watermark_query()) or 0
+
+
+def question_difficulties(question_ids: Collection[int] | None = None) -> dict[int, AccuracyStat]:
+    statement = select(QuestionStat.question_id, QuestionStat.attempts, QuestionStat.correct)
+    if question_ids is not None:
+        statement = statement.where(QuestionStat.question_id.in_(question_ids))
+    with get_engine().connect() as connection:
+        rows = connection.execute(statement)
+        return {
+            question_id: AccuracyStat(str(question_id), attempts, correct)
+            for question_id, attempts, correct in rows
+        }
+
+
+def load_statistics() -> AnalyticsReport:
+    with get_engine().connect() as connection:
+        questions = [
+            AccuracyStat(str(question_id), attempts, correct)
+            for question_id, attempts, correct in connection.execute(
+                select(QuestionStat.question_id, QuestionStat.attempts, QuestionStat.correct)
+            )
+        ]
+        groups: dict[str, list[AccuracyStat]] = {"stage": [], "role": []}
+        for dimension, key, attempts, correct in connection.execute(
+            select(GroupStat.dimension, GroupStat.key, GroupStat.attempts, GroupStat.correct)
+            .order_by(GroupStat.dimension, GroupStat.key)
+        ):
+            groups.setdefault(dimension, []).append(AccuracyStat(key, attempts, correct))
+        jokers = [
+            JokerEffect(*row)
+            for row in connection.execute(
+                select(
+                    JokerStat.joker,
+                    JokerStat.used,
+                    JokerStat.sessions,
+                    JokerStat.completed,
+                    JokerStat.total_score,
+                    JokerStat.attempts,
+                    JokerStat.correct,
+                ).order_by(JokerStat.joker, JokerStat.used)
+            )
+        ]
+        watermark = connection.execute(
+            select(StatsWatermark.last_answer_id, StatsWatermark.refreshed_at).where(
+                StatsWatermark.name == ANSWERS_WATERMARK
+            )
+        ).first()
+    questions.sort(key=lambda stat: stat.difficulty, reverse=True)
+    return AnalyticsReport(
+        questions=questions,
+        stages=groups["stage"],
+        roles=groups["role"],
+        jokers=jokers,
+        last_answer_id=watermark[0] if watermark else 0,
+        refreshed_at=watermark[1] if watermark else None,
+    )
+
+
+def _stat_payload(stat: AccuracyStat | JokerEffect) -> dict[str, Any]:
+    payload = asdict(stat)
+    payload["accuracy"] = round(stat.accuracy, 4)
+    if isinstance(stat, AccuracyStat):
+        payload["difficulty"] = round(stat.difficulty, 4)
+    else:
+        payload["completion_rate"] = round(stat.completion_rate, 4)
+        payload["average_score"] = round(stat.average_score, 2)
+    return payload
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Statistiques des questions, étapes, rôles et jokers"
+    )
+    parser.add_argument("--db", help="Chemin de la base SQLite")
+    parser.add_argument(
+        "--engine-profile", choices=list(ENGINE_PROFILES), help="Réglages SQLite à appliquer"
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Recalcule tout depuis les réponses en base"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Questions les plus difficiles")
+    args = parser.parse_args(argv)
+    if args.db or args.engine_profile:
+        configure_database(args.db, args.engine_profile)
+    init_db()
+    refresh = refresh_statistics(args.rebuild)
+    report = load_statistics()
+    print(
+        json.dumps(
+            {
+                "refresh": asdict(refresh),
+                "hardest_questions": [_stat_payload(stat) for stat in report.questions[: args.top]],
+                "stages": [_stat_payload(stat) for stat in report.stages],
+                "roles": [_stat_payload(stat) for stat in report.roles],
+                "jokers": [_stat_payload(stat) for stat in report.jokers],
+            },
+            indent=2,
+            ensure_ascii=False,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
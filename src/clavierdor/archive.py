@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import IO, Any
+
+from sqlalchemy import Connection, Select, bindparam, delete, exists, select, update
+
+from .analytics import refresh_statistics
+from .models import AnswerLog, GameSession, utc_now
+from .orm import ENGINE_PROFILES, configure_database, db_path, get_engine, init_db
+
+ARCHIVE_DIR_ENV = "CLAVIERDOR_ARCHIVE"
+ARCHIVE_BATCH_SESSIONS = 1000
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ArchiveSegment:
+    month: str
+    offset: int
+    length: int
+    rows: int
+    sessions: int
+    first_session_id: int
+    last_session_id: int
+    archived_at: str
+    committed: bool = False
+
+
+@dataclass
+class ArchiveIndex:
+    segments: list[ArchiveSegment] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, directory: Path) -> ArchiveIndex:
+        path = directory / INDEX_NAME
+        if not path.exists():
+            return cls()
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        if raw.get("version") != INDEX_VERSION:
+            raise ValueError(f"Version d'index d'archive inconnue : {raw.get('version')}")
+        return cls([ArchiveSegment(**segment) for segment in raw["segments"]])
+
+    def save(self, directory: Path) -> None:
+        path = directory / INDEX_NAME
+        temporary = path.with_suffix(".tmp")
+        payload = {
+            "version": INDEX_VERSION,
+            "segments": [asdict(segment) for segment in self.segments],
+        }
+        temporary.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+@dataclass
+class ArchivedAnswer:
+    id: int
+    session_id: int
+    question_id: int
+    selected: str
+    is_correct: bool
+    answered_at: datetime
+
+
+@dataclass
+class ArchiveReport:
+    sessions: int = 0
+    rows: int = 0
+    segments: int = 0
+    bytes_written: int = 0
+    recovered: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def archive_dir() -> Path:
+    configured = os.environ.get(ARCHIVE_DIR_ENV)
+    return Path(configured) if configured else db_path().parent / "archive"
+
+
+def month_file(directory: Path, month: str) -> Path:
+    return directory / f"answers-{month}.jsonl.gz"
+
+
+def archivable_sessions_query(cutoff: datetime, limit: int) -> Select:
+    return (
+        select(GameSession.id, GameSession.started_at)
+        .where(
+            GameSession.completed.is_(True),
+            GameSession.started_at < cutoff,
+            GameSession.archived_at.is_(None),
+        )
+        .order_by(GameSession.id)
+        .limit(limit)
+    )
+
+
+def _answers_query() -> Select:
+    return (
+        select(
+            AnswerLog.id,
+            AnswerLog.session_id,
+            AnswerLog.question_id,
+            AnswerLog.selected,
+            AnswerLog.is_correct,
+            AnswerLog.answered_at,
+        )
+        .where(AnswerLog.session_id.in_(bindparam("session_ids", expanding=True)))
+        .order_by(AnswerLog.session_id, AnswerLog.answered_at, AnswerLog.id)
+    )
+
+
+def _encode(row: Any) -> bytes:
+    record = {
+        "id": row.id,
+        "session_id": row.session_id,
+        "question_id": row.question_id,
+        "selected": row.selected,
+        "is_correct": bool(row.is_correct),
+        "answered_at": row.answered_at.isoformat(),
+    }
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class _MonthWriter:
+    def __init__(self, directory: Path, month: str, session_id: int, stamp: str) -> None:
+        self.handle: IO[bytes] = month_file(directory, month).open("ab")
+        self.offset = self.handle.seek(0, os.SEEK_END)
+        self.stream = gzip.GzipFile(fileobj=self.handle, mode="wb", mtime=0)
+        self.segment = ArchiveSegment(month, self.offset, 0, 0, 0, session_id, session_id, stamp)
+        self._last_session_id: int | None = None
+
+    def add_session(self, session_id: int) -> None:
+        if session_id != self._last_session_id:
+            self.segment.sessions += 1
+            self.segment.last_session_id = session_id
+            self._last_session_id = session_id
+
+    def write(self, row: Any) -> None:
+        self.stream.write(_encode(row))
+        self.segment.rows += 1
+
+    def close(self) -> ArchiveSegment:
+        self.stream.close()
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+        self.segment.length = self.handle.tell() - self.offset
+        self.handle.close()
+        return self.segment
+
+    def abort(self) -> None:
+        self.stream.close()
+        self.handle.truncate(self.offset)
+        self.handle.close()
+
+
+def _recover(connection: Connection, directory: Path, index: ArchiveIndex) -> int:
+    recovered = 0
+    kept = []
+    for segment in index.segments:
+        if segment.committed:
+            kept.append(segment)
+            continue
+        stamp = datetime.fromisoformat(segment.archived_at)
+        if connection.scalar(select(exists().where(GameSession.archived_at == stamp))):
+            segment.committed = True
+            kept.append(segment)
+            continue
+        with month_file(directory, segment.month).open("r+b") as handle:
+            handle.truncate(segment.offset)
+        recovered += 1
+    index.segments = kept
+    return recovered
+
+
+def _archive_batch(
+    directory: Path, index: ArchiveIndex, sessions: list[tuple[int, datetime]]
+) -> ArchiveReport:
+    report = ArchiveReport(sessions=len(sessions))
+    stamp = utc_now()
+    months = {session_id: started_at.strftime("%Y-%m") for session_id, started_at in sessions}
+    writers: dict[str, _MonthWriter] = {}
+    for session_id, month in months.items():
+        if month not in writers:
+            writers[month] = _MonthWriter(directory, month, session_id, stamp.isoformat())
+        writers[month].add_session(session_id)
+    session_ids = list(months)
+    engine = get_engine()
+    try:
+        with engine.connect() as connection:
+            rows = connection.execution_options(yield_per=1000).execute(
+                _answers_query(), {"session_ids": session_ids}
+            )
+            for row in rows:
+                writers[months[row.session_id]].write(row)
+                report.rows += 1
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    segments = [writer.close() for writer in writers.values()]
+    index.segments.extend(segments)
+    index.save(directory)
+    with engine.begin() as connection:
+        connection.execute(
+            delete(AnswerLog).where(
+                AnswerLog.session_id.in_(bindparam("session_ids", expanding=True))
+            ),
+            {"session_ids": session_ids},
+        )
+        connection.execute(
+            update(GameSession)
+            .where(GameSession.id.in_(bindparam("session_ids", expanding=True)))
+            .values(archived_at=stamp),
+            {"session_ids": session_ids},
+        )
+    for segment in segments:
+        segment.committed = True
+    index.save(directory)
+    report.segments = len(segments)
+    report.bytes_written = sum(segment.length for segment in segments)
+    return report
+
+
+def archive_answers(
+    cutoff: datetime,
+    directory: Path | None = None,
+    batch_sessions: int = ARCHIVE_BATCH_SESSIONS,
+) -> ArchiveReport:
+    directory = directory or archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    index = ArchiveIndex.load(directory)
+    report = ArchiveReport()
+    with get_engine().connect() as connection:
+        report.recovered = _recover(connection, directory, index)
+    index.save(directory)
+    refresh_statistics()
+    while True:
+        with get_engine().connect() as connection:
+            sessions = [
+                (session_id, started_at)
+                for session_id, started_at in connection.execute(
+                    archivable_sessions_query(cutoff, batch_sessions)
+                )
+            ]
+        if not sessions:
+            break
+        batch = _archive_batch(directory, index, sessions)
+        report.sessions += batch.sessions
+        report.rows += batch.rows
+        report.segments += batch.segments
+        report.bytes_written += batch.bytes_written
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _iter_member_lines(handle: IO[bytes], segment: ArchiveSegment) -> Iterator[bytes]:
+    handle.seek(segment.offset)
+    remaining = segment.length
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    pending = b""
+    while remaining:
+        chunk = handle.read(min(READ_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise ValueError(f"Archive tronquée : {segment.month} à l'octet {segment.offset}")
+        remaining -= len(chunk)
+        pending += decompressor.decompress(chunk)
+        *lines, pending = pending.split(b"\n")
+        yield from lines
+    pending += decompressor.flush()
+    if pending:
+        yield pending
+
+
+def _iter_range(
+    directory: Path, first_session_id: int, last_session_id: int, month: str | None = None
+) -> Iterator[ArchivedAnswer]:
+    for segment in ArchiveIndex.load(directory).segments:
+        if not segment.committed or (month is not None and segment.month != month):
+            continue
+        if segment.last_session_id < first_session_id:
+            continue
+        if segment.first_session_id > last_session_id:
+            continue
+        with month_file(directory, segment.month).open("rb") as handle:
+            for line in _iter_member_lines(handle, segment):
+                record = json.loads(line)
+                if not first_session_id <= record["session_id"] <= last_session_id:
+                    continue
+                record["answered_at"] = datetime.fromisoformat(record["answered_at"])
+                yield ArchivedAnswer(**record)
+
+
+def iter_archived_answers(
+    directory: Path | None = None,
+    month: str | None = None,
+    session_id: int | None = None,
+) -> Iterator[ArchivedAnswer]:
+    directory = directory or archive_dir()
+    if session_id is None:
+        return _iter_range(directory, 0, sys.maxsize, month)
+    return _iter_range(directory, session_id, session_id, month)
+
+
+def iter_archived_range(
+    first_session_id: int, last_session_id: int, directory: Path | None = None
+) -> Iterator[ArchivedAnswer]:
+    return _iter_range(directory or archive_dir(), first_session_id, last_session_id)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Archive les réponses des parties terminées dans des fichiers mensuels"
+    )
+    parser.add_argument(
+        "--days", type=int, default=180, help="Archive les parties commencées avant N jours"
+    )
+    parser.add_argument("--dir", type=Path, help="Dossier des archives")
+    parser.add_argument("--db", help="Chemin de la base SQLite")
+    parser.add_argument(
+        "--engine-profile", choices=list(ENGINE_PROFILES), help="Réglages SQLite à appliquer"
+    )
+    parser.add_argument("--batch-sessions", type=int, default=ARCHIVE_BATCH_SESSIONS)
+    parser.add_argument(
+        "--dump", metavar="AAAA-MM", help="Affiche les réponses archivées du mois"
+    )
+    parser.add_argument("--session", type=int, help="Limite --dump à une partie")
+    args = parser.parse_args(argv)
+    if args.db or args.engine_profile:
+        configure_database(args.db, args.engine_profile)
+    if args.dump:
+        for answer in iter_archived_answers(args.dir, args.dump, args.session):
+            record = asdict(answer)
+            record["answered_at"] = answer.answered_at.isoformat()
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return
+    init_db()
+    cutoff = utc_now() - timedelta(days=args.days)
+    report = archive_answers(cutoff, args.dir, args.batch_sessions)
+    print(
+        f"{report.sessions} parties archivées : {report.rows} réponses en {report.segments} "
+        f"segments ({report.bytes_written} octets, {report.rows_per_second:.0f} lignes/s)"
+    )
+    if report.recovered:
+        print(f"{report.recovered} segments incomplets retirés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .core import GameCore, SessionState, history_query
+from .data import seed_questions
+from .models import (
+    GameSession,
+    LeaderboardWindow,
+    Player,
+    RoleType,
+    leaderboard_bucket,
+    utc_now,
+)
+from .orm import create_async_db_engine, init_db
+from .search import QuestionSearchPage, SearchCursor, match_expression, search_query
+from .services import (
+    LeaderboardCursor,
+    LeaderboardPage,
+    leaderboard_page,
+    leaderboard_query,
+    scores_query,
+    search_page,
+)
+from .session_cache import CacheStats, SessionStateCache
+from .write_behind import WriteBehindLog
+
+
+class AsyncGameService:
+    def __init__(
+        self,
+        write_behind: WriteBehindLog | None = None,
+        state_cache: SessionStateCache | None = None,
+        question_snapshot: Path | None = None,
+    ) -> None:
+        init_db(seed_questions)
+        self._core = GameCore(write_behind, question_snapshot)
+        self._state_cache = state_cache or SessionStateCache()
+        self._engine = create_async_db_engine()
+        self._sessions = async_sessionmaker(
+            self._engine, autoflush=False, expire_on_commit=False
+        )
+        self._write_lock = asyncio.Lock()
+
+    async def _ensure_questions_loaded(self) -> None:
+        if not self._core.questions_loaded:
+            await asyncio.to_thread(self._core.ensure_questions_loaded)
+
+    async def _flush(self) -> None:
+        if self._core.write_behind is not None:
+            await asyncio.to_thread(self._core.flush)
+
+    async def start_new_game(self, name: str, role: RoleType) -> SessionState:
+        await self._ensure_questions_loaded()
+        async with self._write_lock, self._sessions() as session:
+            state = await session.run_sync(self._core.start_game, name, role)
+        self._state_cache.put(state, latest=True)
+        return state
+
+    async def resume_last_game(self, name: str) -> SessionState | None:
+        cached = self._state_cache.get_latest(name)
+        if cached is not None:
+            return cached
+        await self._ensure_questions_loaded()
+        async with self._sessions() as session:
+            state = await session.run_sync(self._core.resume_game, name)
+        if state is not None:
+            self._state_cache.put(state, latest=True)
+        return state
+
+    async def get_state(self, session_id: int) -> SessionState:
+        cached = self._state_cache.get(session_id)
+        if cached is not None:
+            return cached
+        await self._ensure_questions_loaded()
+        async with self._sessions() as session:
+            state = await session.run_sync(self._core.load_state, session_id)
+        self._state_cache.put(state)
+        return state
+
+    def cache_stats(self) -> CacheStats:
+        return self._state_cache.stats()
+
+    async def submit_answer(
+        self, session_id: int, question_id: int, selected: str
+    ) -> SessionState:
+        await self._ensure_questions_loaded()
+        async with self._write_lock, self._sessions() as session:
+            state, written = await session.run_sync(
+                self._core.submit_answer, session_id, question_id, selected
+            )
+        if written is not None:
+            await asyncio.wrap_future(written)
+        self._state_cache.put(state)
+        return state
+
+    async def use_front_joker(
+        self, session_id: int, current_question_id: int | None
+    ) -> SessionState:
+        await self._ensure_questions_loaded()
+        await self._flush()
+        async with self._write_lock, self._sessions() as session:
+            state = await session.run_sync(
+                self._core.use_front_joker, session_id, current_question_id
+            )
+        self._state_cache.put(state)
+        return state
+
+    async def use_back_joker(self, session_id: int) -> SessionState:
+        await self._ensure_questions_loaded()
+        await self._flush()
+        async with self._write_lock, self._sessions() as session:
+            state = await session.run_sync(self._core.use_back_joker, session_id)
+        self._state_cache.put(state)
+        return state
+
+    async def use_mobile_joker(self, session_id: int) -> str:
+        await self._ensure_questions_loaded()
+        await self._flush()
+        async with self._write_lock, self._sessions() as session:
+            hint = await session.run_sync(self._core.use_mobile_joker, session_id)
+        self._state_cache.update(session_id, perk_used=True)
+        return hint
+
+    async def list_scores(self) -> list[tuple[str, int, datetime]]:
+        async with self._sessions() as session:
+            results = (await session.execute(scores_query())).all()
+            return [(name, score, started_at) for name, score, started_at in results]
+
+    async def iter_scores(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[tuple[str, int, datetime]]:
+        async with self._sessions() as session:
+            results = await session.stream(
+                scores_query().execution_options(yield_per=batch_size)
+            )
+            async for name, score, started_at in results:
+                yield name, score, started_at
+
+    async def leaderboard(
+        self,
+        limit: int = 10,
+        after: LeaderboardCursor | None = None,
+        window: LeaderboardWindow | None = None,
+        bucket: str | None = None,
+    ) -> LeaderboardPage:
+        if window is not None and bucket is None:
+            bucket = leaderboard_bucket(window, utc_now())
+        async with self._sessions() as session:
+            rows = (await session.execute(leaderboard_query(limit, after, window, bucket))).all()
+        return leaderboard_page(rows, limit)
+
+    async def iter_leaderboard(
+        self,
+        window: LeaderboardWindow | None = None,
+        bucket: str | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[tuple[str, int, datetime]]:
+        if window is not None and bucket is None:
+            bucket = leaderboard_bucket(window, utc_now())
+        after = None
+        while True:
+            page = await self.leaderboard(batch_size, after, window, bucket)
+            for entry in page.entries:
+                yield entry.player_name, entry.score, entry.started_at
+            if page.next_cursor is None:
+                return
+            after = page.next_cursor
+
+    async def search_questions(
+        self, text: str, limit: int = 20, after: SearchCursor | None = None
+    ) -> QuestionSearchPage:
+        statement = search_query(match_expression(text), limit, after)
+        async with self._sessions() as session:
+            rows = (await session.execute(statement)).all()
+        return search_page(rows, limit)
+
+    async def list_history(self, name: str) -> list[GameSession]:
+        async with self._sessions() as session:
+            player = await session.scalar(select(Player).where(Player.name == name))
+            if player is None:
+                return []
+            return list(await session.scalars(history_query(player.id)))
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._core.close)
+        await self._engine.dispose()
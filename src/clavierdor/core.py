@@ -0,0 +1,597 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import insort
+from collections import OrderedDict, deque
+from collections.abc import Collection, Mapping, Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .analytics import question_difficulties, stats_version
+from .models import (
+    AnswerLog,
+    GameSession,
+    Player,
+    PlayerBestScore,
+    Question,
+    QuestionChange,
+    RoleType,
+    utc_now,
+)
+from .orm import get_engine, get_session, question_bank_version
+from .scoring import STAGE_MAX, apply_answer, apply_back_joker
+from .selection import QuestionSelector
+from .snapshot import BankQuestion, QuestionSnapshot, load_snapshot
+from .write_behind import (
+    SESSION_COLUMNS,
+    Durability,
+    WriteBehindLog,
+    period_best_rows,
+    period_best_upsert,
+)
+
+
+class NotFoundError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionView:
+    id: int
+    prompt: str
+    choices: Mapping[str, str]
+    correct_choice: str
+    hint: str
+    stage: int
+
+
+@dataclass(slots=True)
+class SessionState:
+    session_id: int
+    player_name: str
+    role: RoleType
+    stage: int
+    score: int
+    streak: int
+    correct_answers: int
+    total_answers: int
+    accuracy: float
+    current_question: QuestionView | None
+    completed: bool
+    perk_used: bool
+
+
+def history_query(player_id: int) -> Select:
+    return (
+        select(GameSession)
+        .where(GameSession.player_id == player_id)
+        .order_by(GameSession.started_at.desc())
+    )
+
+
+def last_answer_query(session_id: int) -> Select:
+    return (
+        select(AnswerLog)
+        .where(AnswerLog.session_id == session_id)
+        .order_by(AnswerLog.answered_at.desc())
+        .limit(1)
+    )
+
+
+def question_changes_query(after_version: int) -> Select:
+    return (
+        select(QuestionChange.version, QuestionChange.question_id)
+        .where(QuestionChange.version > after_version)
+        .order_by(QuestionChange.version)
+    )
+
+
+def seen_questions_query(player_id: int, limit: int) -> Select:
+    return (
+        select(AnswerLog.question_id)
+        .join(GameSession, GameSession.id == AnswerLog.session_id)
+        .where(GameSession.player_id == player_id)
+        .order_by(AnswerLog.id.desc())
+        .limit(limit)
+    )
+
+
+class GameCore:
+    STAGE_MAX = STAGE_MAX
+    SEEN_PER_PLAYER = 200
+    SEEN_PLAYERS = 10_000
+    WEIGHTS_REFRESH_SECONDS = 60.0
+    QUESTIONS_CHECK_SECONDS = 1.0
+    QUESTIONS_FULL_RELOAD = 1000
+
+    def __init__(
+        self,
+        write_behind: WriteBehindLog | None = None,
+        question_snapshot: Path | None = None,
+    ) -> None:
+        self.write_behind = write_behind
+        self._question_snapshot = question_snapshot
+        self._questions_by_stage: dict[int, list[Question | BankQuestion]] = {}
+        self._questions_by_id: dict[int, Question | BankQuestion] = {}
+        self._question_views: dict[int, QuestionView] = {}
+        self._snapshot: QuestionSnapshot | None = None
+        self._index_lock = threading.RLock()
+        self._selector = QuestionSelector(self.STAGE_MAX)
+        self._weights_version: int | None = None
+        self._weights_checked_at = 0.0
+        self._bank_version = 0
+        self._questions_checked_at = 0.0
+        self._refreshing = False
+        self._seen: OrderedDict[int, deque[int]] = OrderedDict()
+        self._seen_lock = threading.Lock()
+
+    @property
+    def questions_loaded(self) -> bool:
+        return bool(self._questions_by_stage)
+
+    def ensure_questions_loaded(self) -> None:
+        if not self._questions_by_stage:
+            with self._index_lock:
+                if not self._questions_by_stage:
+                    self._load_questions()
+        self._maybe_refresh()
+
+    def start_game(self, session: Session, name: str, role: RoleType) -> SessionState:
+        player = session.scalar(select(Player).where(Player.name == name))
+        is_new_player = player is None
+        if player is None:
+            player = Player(name=name, role=role)
+            session.add(player)
+            session.flush()
+        else:
+            player.role = role
+            recent = session.scalars(seen_questions_query(player.id, self.SEEN_PER_PLAYER))
+            self._remember_seen(player.id, list(recent)[::-1], reset=True)
+        new_session = GameSession(player=player)
+        session.add(new_session)
+        session.flush()
+        if is_new_player:
+            self._remember_seen(player.id, [], reset=True)
+            self._record_best_score(session, new_session)
+        self._choose_question(session, new_session)
+        session.commit()
+        return self._build_state(new_session)
+
+    def resume_game(self, session: Session, name: str) -> SessionState | None:
+        player = session.scalar(select(Player).where(Player.name == name))
+        if player is None:
+            return None
+        session_obj = session.scalar(history_query(player.id).limit(1))
+        if session_obj is None:
+            return None
+        self._apply_pending(session_obj)
+        return self._build_state(session_obj)
+
+    def load_state(self, session: Session, session_id: int) -> SessionState:
+        session_obj = self._get_game_session(session, session_id)
+        if session_obj is None:
+            raise NotFoundError("Session inconnue")
+        return self._build_state(session_obj)
+
+    def submit_answer(
+        self, session: Session, session_id: int, question_id: int, selected: str
+    ) -> tuple[SessionState, Future | None]:
+        session_obj = self._get_game_session(session, session_id)
+        question = self._find_question(session, question_id)
+        if session_obj is None or question is None:
+            raise NotFoundError("Session ou question inconnue")
+        is_correct = selected == question.correct_choice
+        apply_answer(session_obj, is_correct, self.STAGE_MAX)
+        self._ensure_seen(session, session_obj.player_id)
+        self._remember_seen(session_obj.player_id, [question.id])
+        self._choose_question(session, session_obj)
+        write_behind = self.write_behind
+        if write_behind is None:
+            if is_correct:
+                self._record_best_score(session, session_obj)
+            session.add(
+                AnswerLog(
+                    session=session_obj,
+                    question_id=question.id,
+                    selected=selected,
+                    is_correct=is_correct,
+                )
+            )
+            session.commit()
+            return self._build_state(session_obj), None
+        written: Future | None = self._queue_answer(
+            write_behind, session_obj, question.id, selected, is_correct
+        )
+        if write_behind.durability is not Durability.FULL:
+            written = None
+        return self._build_state(session_obj), written
+
+    def use_front_joker(
+        self, session: Session, session_id: int, current_question_id: int | None
+    ) -> SessionState:
+        session_obj = self._get_game_session(session, session_id)
+        if session_obj is None:
+            raise NotFoundError("Session inconnue")
+        if not session_obj.front_joker_used:
+            if current_question_id is not None:
+                session_obj.deck_offset = (session_obj.deck_offset or 0) + 1
+                self._choose_question(session, session_obj)
+            session_obj.front_joker_used = True
+            session.commit()
+        return self._build_state(session_obj)
+
+    def use_back_joker(self, session: Session, session_id: int) -> SessionState:
+        session_obj = self._get_game_session(session, session_id)
+        if session_obj is None:
+            raise NotFoundError("Session inconnue")
+        if not session_obj.back_joker_used:
+            last_answer = session.scalar(last_answer_query(session_id))
+            if last_answer and not last_answer.is_correct:
+                apply_back_joker(session_obj)
+                self._record_best_score(session, session_obj)
+            session_obj.back_joker_used = True
+            session.commit()
+        return self._build_state(session_obj)
+
+    def use_mobile_joker(self, session: Session, session_id: int) -> str:
+        session_obj = session.get(GameSession, session_id)
+        if session_obj is None:
+            raise NotFoundError("Session inconnue")
+        if session_obj.mobile_joker_used:
+            return "Indice déjà utilisé."
+        session_obj.mobile_joker_used = True
+        question = self._current_question(session_obj)
+        session.commit()
+        if question:
+            return self._question_view(question).hint or "Pas d'indice disponible."
+        return "Pas d'indice disponible."
+
+    def flush(self) -> None:
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    def close(self) -> None:
+        if self.write_behind is not None:
+            self.write_behind.close()
+        with self._index_lock:
+            if self._snapshot is not None:
+                self._snapshot.close()
+
+    def _load_questions(self) -> dict[int, list[Question | BankQuestion]]:
+        questions: Sequence[Question | BankQuestion]
+        snapshot = None
+        if self._question_snapshot is not None:
+            snapshot = load_snapshot(self._question_snapshot)
+            bank_version = snapshot.bank_version
+            questions = snapshot.questions()
+        else:
+            with get_session() as session:
+                bank_version = question_bank_version(session.connection())
+                questions = session.scalars(select(Question).order_by(Question.id)).all()
+        by_stage: dict[int, list[Question | BankQuestion]] = {}
+        for question in questions:
+            by_stage.setdefault(question.stage, []).append(question)
+        weights_version = stats_version()
+        difficulties = self._difficulties()
+        with self._index_lock:
+            self._selector.rebuild(by_stage, difficulties)
+            self._weights_version = weights_version
+            self._weights_checked_at = time.monotonic()
+            self._questions_by_stage = by_stage
+            self._questions_by_id = {question.id: question for question in questions}
+            self._question_views = {}
+            self._bank_version = bank_version
+            self._questions_checked_at = time.monotonic()
+            previous, self._snapshot = self._snapshot, snapshot
+            if previous is not None:
+                previous.close()
+        return by_stage
+
+    def _difficulties(self, question_ids: Collection[int] | None = None) -> dict[int, float]:
+        return {
+            question_id: stat.difficulty
+            for question_id, stat in question_difficulties(question_ids).items()
+        }
+
+    def _maybe_refresh(self) -> None:
+        now = time.monotonic()
+        questions_due = now - self._questions_checked_at >= self.QUESTIONS_CHECK_SECONDS
+        weights_due = now - self._weights_checked_at >= self.WEIGHTS_REFRESH_SECONDS
+        if not questions_due and not weights_due:
+            return
+        with self._index_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            if questions_due:
+                self._questions_checked_at = now
+            if weights_due:
+                self._weights_checked_at = now
+        threading.Thread(
+            target=self._refresh,
+            args=(questions_due, weights_due),
+            name="clavierdor-refresh",
+            daemon=True,
+        ).start()
+
+    def _refresh(self, questions: bool, weights: bool) -> None:
+        try:
+            if questions:
+                self._refresh_questions()
+            if weights:
+                self._refresh_weights()
+        finally:
+            with self._index_lock:
+                self._refreshing = False
+
+    def _refresh_weights(self) -> None:
+        version = stats_version()
+        if version == self._weights_version:
+            return
+        difficulties = self._difficulties()
+        with self._index_lock:
+            self._selector.rebuild(self._questions_by_stage, difficulties)
+            self._weights_version = version
+
+    def _refresh_questions(self) -> None:
+        with get_engine().connect() as connection:
+            if question_bank_version(connection) == self._bank_version:
+                return
+            changes = connection.execute(question_changes_query(self._bank_version)).all()
+        if (
+            not changes
+            or changes[0].version != self._bank_version + 1
+            or len(changes) > self.QUESTIONS_FULL_RELOAD
+        ):
+            self._load_questions()
+            return
+        self._reload_questions({change.question_id for change in changes}, changes[-1].version)
+
+    def _reload_questions(self, question_ids: set[int], bank_version: int) -> None:
+        with get_session() as session:
+            fresh = {
+                question.id: question
+                for question in session.scalars(
+                    select(Question).where(Question.id.in_(question_ids))
+                )
+            }
+        difficulties = self._difficulties(question_ids)
+        with self._index_lock:
+            self._swap_questions(fresh, question_ids, bank_version, difficulties)
+
+    def _swap_questions(
+        self,
+        fresh: dict[int, Question],
+        question_ids: set[int],
+        bank_version: int,
+        difficulties: dict[int, float],
+    ) -> None:
+        changed: dict[int, list[Question | BankQuestion]] = {}
+        for question_id in question_ids:
+            previous = self._questions_by_id.get(question_id)
+            if previous is not None:
+                changed.setdefault(previous.stage, [])
+            question = fresh.get(question_id)
+            if question is None:
+                self._questions_by_id.pop(question_id, None)
+            else:
+                self._questions_by_id[question_id] = question
+                changed.setdefault(question.stage, []).append(question)
+            self._question_views.pop(question_id, None)
+        by_stage = dict(self._questions_by_stage)
+        for stage, added in changed.items():
+            questions = [
+                question
+                for question in by_stage.get(stage, [])
+                if question.id not in question_ids
+            ]
+            for question in added:
+                insort(questions, question, key=lambda question: question.id)
+            by_stage[stage] = questions
+        self._selector.update(
+            {stage: by_stage[stage] for stage in changed}, difficulties, question_ids
+        )
+        self._questions_by_stage = {
+            stage: questions for stage, questions in by_stage.items() if questions
+        }
+        self._bank_version = bank_version
+
+    def _seen_questions(self, player_id: int) -> frozenset[int]:
+        with self._seen_lock:
+            seen = self._seen.get(player_id)
+            if seen is None:
+                return frozenset()
+            self._seen.move_to_end(player_id)
+            return frozenset(seen)
+
+    def _remember_seen(self, player_id: int, question_ids: list[int], reset: bool = False) -> None:
+        with self._seen_lock:
+            seen = None if reset else self._seen.get(player_id)
+            if seen is None:
+                seen = self._seen[player_id] = deque(maxlen=self.SEEN_PER_PLAYER)
+            seen.extend(question_ids)
+            self._seen.move_to_end(player_id)
+            while len(self._seen) > self.SEEN_PLAYERS:
+                self._seen.popitem(last=False)
+
+    def _ensure_seen(self, session: Session, player_id: int) -> None:
+        with self._seen_lock:
+            if player_id in self._seen:
+                return
+        recent = session.scalars(seen_questions_query(player_id, self.SEEN_PER_PLAYER))
+        self._remember_seen(player_id, list(recent)[::-1], reset=True)
+
+    def _find_question(
+        self, session: Session, question_id: int
+    ) -> Question | BankQuestion | None:
+        self.ensure_questions_loaded()
+        question = self._questions_by_id.get(question_id)
+        if question is None:
+            question = session.get(Question, question_id)
+        return question
+
+    def _get_game_session(self, session: Session, session_id: int) -> GameSession | None:
+        pending = self.write_behind.pending_values(session_id) if self.write_behind else None
+        session_obj = session.get(
+            GameSession, session_id, options=[joinedload(GameSession.player)]
+        )
+        if session_obj is not None and pending is not None:
+            self._apply_pending(session_obj, pending)
+        return session_obj
+
+    def _apply_pending(self, session_obj: GameSession, pending: dict | None = None) -> None:
+        if pending is None and self.write_behind is not None:
+            pending = self.write_behind.pending_values(session_obj.id)
+        for column, value in (pending or {}).items():
+            set_committed_value(session_obj, column, value)
+
+    def _choose_question(self, session: Session, session_obj: GameSession) -> None:
+        if session_obj.completed:
+            session_obj.current_question_id = None
+            return
+        self.ensure_questions_loaded()
+        self._ensure_seen(session, session_obj.player_id)
+        question = self._selector.choose(
+            session_obj.stage,
+            self._deck_seed(session_obj),
+            session_obj.deck_offset or 0,
+            self._seen_questions(session_obj.player_id),
+        )
+        session_obj.current_question_id = question.id if question else None
+
+    def _current_question(self, session_obj: GameSession) -> Question | BankQuestion | None:
+        self.ensure_questions_loaded()
+        if session_obj.current_question_id is not None:
+            question = self._questions_by_id.get(session_obj.current_question_id)
+            if question is not None:
+                return question
+        return self._selector.choose(
+            session_obj.stage, self._deck_seed(session_obj), session_obj.deck_offset or 0
+        )
+
+    def _deck_seed(self, session_obj: GameSession) -> int:
+        return session_obj.deck_seed if session_obj.deck_seed is not None else session_obj.id
+
+    def _question_view(self, question: Question | BankQuestion) -> QuestionView:
+        view = self._question_views.get(question.id)
+        if view is not None:
+            return view
+        with self._index_lock:
+            question = self._questions_by_id.get(question.id, question)
+            return self._question_views.setdefault(
+                question.id,
+                QuestionView(
+                    id=question.id,
+                    prompt=question.prompt,
+                    choices=MappingProxyType(
+                        {
+                            "A": question.choice_a,
+                            "B": question.choice_b,
+                            "C": question.choice_c,
+                            "D": question.choice_d,
+                        }
+                    ),
+                    correct_choice=question.correct_choice,
+                    hint=question.hint,
+                    stage=question.stage,
+                ),
+            )
+
+    def _build_state(self, session_obj: GameSession) -> SessionState:
+        total_answers = session_obj.total_answers or 0
+        correct_answers = session_obj.correct_answers or 0
+        accuracy = (correct_answers / total_answers * 100) if total_answers else 0.0
+        question = None
+        if not session_obj.completed:
+            question_obj = self._current_question(session_obj)
+            if question_obj:
+                question = self._question_view(question_obj)
+        perk_used = self._perk_used(session_obj)
+        return SessionState(
+            session_id=session_obj.id,
+            player_name=session_obj.player.name,
+            role=session_obj.player.role,
+            stage=session_obj.stage,
+            score=session_obj.score,
+            streak=session_obj.streak,
+            correct_answers=correct_answers,
+            total_answers=total_answers,
+            accuracy=accuracy,
+            current_question=question,
+            completed=session_obj.completed,
+            perk_used=perk_used,
+        )
+
+    def _queue_answer(
+        self,
+        write_behind: WriteBehindLog,
+        session_obj: GameSession,
+        question_id: int,
+        selected: str,
+        is_correct: bool,
+    ) -> Future:
+        best_score = None
+        if is_correct:
+            best_score = {
+                "player_id": session_obj.player_id,
+                "session_id": session_obj.id,
+                "score": session_obj.score,
+                "started_at": session_obj.started_at,
+            }
+        return write_behind.submit(
+            session_obj.id,
+            {column: getattr(session_obj, column) for column in SESSION_COLUMNS},
+            {
+                "session_id": session_obj.id,
+                "question_id": question_id,
+                "selected": selected,
+                "is_correct": is_correct,
+                "answered_at": utc_now(),
+            },
+            best_score,
+        )
+
+    def _record_best_score(self, session: Session, session_obj: GameSession) -> None:
+        best = session.get(PlayerBestScore, session_obj.player_id)
+        if best is None:
+            session.add(
+                PlayerBestScore(
+                    player_id=session_obj.player_id,
+                    session_id=session_obj.id,
+                    score=session_obj.score,
+                    started_at=session_obj.started_at,
+                )
+            )
+        elif best.session_id == session_obj.id or session_obj.score > best.score:
+            best.session_id = session_obj.id
+            best.score = session_obj.score
+            best.started_at = session_obj.started_at
+        session.execute(
+            period_best_upsert(),
+            period_best_rows(
+                [
+                    {
+                        "player_id": session_obj.player_id,
+                        "session_id": session_obj.id,
+                        "score": session_obj.score,
+                        "started_at": session_obj.started_at,
+                    }
+                ]
+            ),
+        )
+
+    def _perk_used(self, session_obj: GameSession) -> bool:
+        return any(
+            [
+                session_obj.front_joker_used,
+                session_obj.back_joker_used,
+                session_obj.mobile_joker_used,
+            ]
+        )
@@ -1,9 +1,31 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+import argparse
+import csv
+import json
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, TextIO
 
-from .models import Question
-from .orm import get_session
+from sqlalchemy import Connection, bindparam, insert, select, update
+
+from .models import Question, question_content_hash
+from .orm import (
+    ENGINE_PROFILES,
+    configure_database,
+    get_engine,
+    init_db,
+    prune_question_changes,
+)
+from .search import NearDuplicate, NearDuplicateDetector
+
+CHOICE_MAX_LENGTH = 200
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 50
+QUESTION_CHANGES_KEPT = 10_000
 
 QUESTIONS = [
     {
@@ -119,10 +141,281 @@ QUESTIONS = [
 ]
 
 
-def seed_questions() -> None:
-    with get_session() as session:
-        existing = session.scalar(select(Question.id))
-        if existing:
+def _with_hash(item: dict[str, Any]) -> dict[str, Any]:
+    return {
+        **item,
+        "content_hash": question_content_hash(
+            item["prompt"], item["choice_a"], item["choice_b"], item["choice_c"], item["choice_d"]
+        ),
+    }
+
+
+def seed_questions(connection: Connection) -> None:
+    existing = connection.scalar(select(Question.id).limit(1))
+    if existing:
+        return
+    connection.execute(insert(Question), [_with_hash(item) for item in QUESTIONS])
+
+
+class QuestionValidationError(ValueError):
+    pass
+
+
+_INVALID_JSON = object()
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    near_duplicates: int = 0
+    errors: list[str] = field(default_factory=list)
+    near_duplicate_pairs: list[NearDuplicate] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def validate_question(raw: Any) -> dict[str, Any]:
+    if raw is _INVALID_JSON:
+        raise QuestionValidationError("JSON invalide")
+    if not isinstance(raw, dict):
+        raise QuestionValidationError("un objet est attendu")
+    item: dict[str, Any] = {}
+    for name in ("prompt", "choice_a", "choice_b", "choice_c", "choice_d"):
+        value = raw.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise QuestionValidationError(f"champ {name} manquant")
+        if name != "prompt" and len(value) > CHOICE_MAX_LENGTH:
+            raise QuestionValidationError(f"champ {name} trop long")
+        item[name] = value.strip()
+    correct_choice = str(raw.get("correct_choice") or "").strip().upper()
+    if correct_choice not in {"A", "B", "C", "D"}:
+        raise QuestionValidationError("correct_choice doit valoir A, B, C ou D")
+    item["correct_choice"] = correct_choice
+    try:
+        item["stage"] = int(raw.get("stage") or 1)
+    except (TypeError, ValueError) as exc:
+        raise QuestionValidationError("stage doit être un entier") from exc
+    if item["stage"] < 1:
+        raise QuestionValidationError("stage doit être positif")
+    hint = raw.get("hint") or ""
+    if not isinstance(hint, str) or len(hint) > CHOICE_MAX_LENGTH:
+        raise QuestionValidationError("hint invalide")
+    item["hint"] = hint.strip()
+    return _with_hash(item)
+
+
+def _iter_json_array(handle: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if buffer.startswith("["):
+                buffer = buffer[1:]
+                started = True
+                continue
+        elif buffer.startswith("]"):
             return
-        session.add_all(Question(**item) for item in QUESTIONS)
-        session.commit()
+        elif buffer.startswith(","):
+            buffer = buffer[1:]
+            continue
+        elif buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                buffer = buffer[end:]
+                continue
+        if eof:
+            if started:
+                raise ValueError("Tableau JSON non terminé")
+            raise ValueError("Un tableau JSON est attendu")
+        chunk = handle.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_question_file(path: Path) -> Iterator[Any]:
+    suffix = path.suffix.lower()
+    with path.open(encoding="utf-8", newline="") as handle:
+        if suffix == ".csv":
+            yield from csv.DictReader(handle)
+        elif suffix == ".jsonl":
+            for line in handle:
+                if not line.strip():
+                    continue
+                try:
+                    raw = json.loads(line)
+                except json.JSONDecodeError:
+                    raw = _INVALID_JSON
+                yield raw
+        elif suffix == ".json":
+            yield from _iter_json_array(handle)
+        else:
+            raise ValueError(f"Format de questions inconnu : {path.suffix}")
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _import_batch(
+    connection: Connection,
+    batch: list[dict[str, Any]],
+    report: ImportReport,
+    detector: NearDuplicateDetector | None = None,
+) -> None:
+    existing = {
+        row.content_hash: row
+        for row in connection.execute(
+            select(
+                Question.id,
+                Question.content_hash,
+                Question.correct_choice,
+                Question.stage,
+                Question.hint,
+            ).where(Question.content_hash.in_([item["content_hash"] for item in batch]))
+        )
+    }
+    inserts = []
+    updates = []
+    for item in batch:
+        current = existing.get(item["content_hash"])
+        if current is None:
+            inserts.append(item)
+        elif (current.correct_choice, current.stage, current.hint) != (
+            item["correct_choice"],
+            item["stage"],
+            item["hint"],
+        ):
+            updates.append({**item, "question_id": current.id})
+        else:
+            report.unchanged += 1
+    if inserts and detector is not None:
+        inserted_ids = connection.execute(
+            insert(Question).returning(Question.id, sort_by_parameter_order=True), inserts
+        ).scalars()
+        found = detector.check(connection, list(zip(inserted_ids, inserts, strict=True)))
+        report.near_duplicates += len(found)
+        room = MAX_REPORTED_ERRORS - len(report.near_duplicate_pairs)
+        report.near_duplicate_pairs.extend(found[: max(room, 0)])
+        report.inserted += len(inserts)
+    elif inserts:
+        connection.execute(insert(Question), inserts)
+        report.inserted += len(inserts)
+    if updates:
+        connection.execute(
+            update(Question)
+            .where(Question.id == bindparam("question_id"))
+            .values(
+                prompt=bindparam("prompt"),
+                choice_a=bindparam("choice_a"),
+                choice_b=bindparam("choice_b"),
+                choice_c=bindparam("choice_c"),
+                choice_d=bindparam("choice_d"),
+                correct_choice=bindparam("correct_choice"),
+                stage=bindparam("stage"),
+                hint=bindparam("hint"),
+            ),
+            updates,
+        )
+        report.updated += len(updates)
+
+
+def import_questions(
+    rows: Iterable[Any],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    near_duplicates: bool = False,
+) -> ImportReport:
+    report = ImportReport()
+    started = time.perf_counter()
+    seen: set[str] = set()
+
+    def valid_rows() -> Iterator[dict[str, Any]]:
+        for line, raw in enumerate(rows, start=1):
+            report.read += 1
+            try:
+                item = validate_question(raw)
+            except QuestionValidationError as exc:
+                report.invalid += 1
+                if len(report.errors) < MAX_REPORTED_ERRORS:
+                    report.errors.append(f"ligne {line} : {exc}")
+                continue
+            if item["content_hash"] in seen:
+                report.duplicates += 1
+                continue
+            seen.add(item["content_hash"])
+            yield item
+
+    engine = get_engine()
+    detector = None
+    if near_duplicates:
+        with engine.connect() as connection:
+            detector = NearDuplicateDetector(connection)
+    for batch in _batched(valid_rows(), batch_size):
+        with engine.begin() as connection:
+            _import_batch(connection, batch, report, detector)
+    with engine.begin() as connection:
+        prune_question_changes(connection, QUESTION_CHANGES_KEPT)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def import_question_file(
+    path: Path, batch_size: int = IMPORT_BATCH_SIZE, near_duplicates: bool = False
+) -> ImportReport:
+    return import_questions(iter_question_file(path), batch_size, near_duplicates)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Importe une banque de questions (JSON, JSONL, CSV)"
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--db", help="Chemin de la base SQLite")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--engine-profile", choices=list(ENGINE_PROFILES), help="Réglages SQLite à appliquer"
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        action="store_true",
+        help="Signale les nouvelles questions proches d'une question existante",
+    )
+    args = parser.parse_args(argv)
+    if args.db or args.engine_profile:
+        configure_database(args.db, args.engine_profile)
+    init_db(seed_questions)
+    report = import_question_file(args.path, args.batch_size, args.near_duplicates)
+    for error in report.errors:
+        print(error)
+    for duplicate in report.near_duplicate_pairs:
+        print(
+            f"question {duplicate.question_id} proche de la question {duplicate.similar_id} "
+            f"({duplicate.similarity:.0%})"
+        )
+    print(
+        f"{report.read} lignes lues : {report.inserted} ajoutées, {report.updated} modifiées, "
+        f"{report.unchanged} inchangées, {report.duplicates} doublons, "
+        f"{report.invalid} invalides, {report.near_duplicates} quasi-doublons "
+        f"({report.rows_per_second:.0f} lignes/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
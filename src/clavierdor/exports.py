@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from pathlib import Path
+
+ScoreRows = Iterable[tuple[str, int, datetime]]
+
+
+def export_scores_pdf(path: Path, scores: ScoreRows, title: str | None = None) -> Path:
+    from .pdf_export import export_scores
+
+    return export_scores(path, scores, title)
+
+
+def export_scores_csv(path: Path, scores: ScoreRows, title: str | None = None) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["joueur", "score", "date"])
+        writer.writerows(
+            (name, score, started_at.isoformat()) for name, score, started_at in scores
+        )
+    return path
+
+
+def export_scores_jsonl(path: Path, scores: ScoreRows, title: str | None = None) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        for name, score, started_at in scores:
+            record = {"joueur": name, "score": score, "date": started_at.isoformat()}
+            handle.write(json.dumps(record, ensure_ascii=False))
+            handle.write("\n")
+    return path
+
+
+EXPORTERS: dict[str, Callable[[Path, ScoreRows, str | None], Path]] = {
+    "pdf": export_scores_pdf,
+    "csv": export_scores_csv,
+    "jsonl": export_scores_jsonl,
+}
+
+
+def export_scores(
+    path: Path, scores: ScoreRows, fmt: str | None = None, title: str | None = None
+) -> Path:
+    fmt = fmt or path.suffix.lstrip(".").lower()
+    exporter = EXPORTERS.get(fmt)
+    if exporter is None:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    return exporter(path, scores, title)
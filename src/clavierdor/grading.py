@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, TypeVar
+
+from sqlalchemy import Connection, bindparam, insert, select, update
+
+from .data import seed_questions
+from .models import AnswerLog, GameSession, Player, Question, RoleType, utc_now
+from .orm import ENGINE_PROFILES, configure_database, get_engine, init_db
+from .scoring import STAGE_MAX, Progress, apply_answer
+from .write_behind import best_score_upsert, period_best_rows, period_best_upsert
+
+GRADE_CHUNK_SIZE = 1000
+PLAYER_NAME_MAX_LENGTH = 120
+MAX_REPORTED_ERRORS = 50
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class SheetValidationError(ValueError):
+    pass
+
+
+@dataclass
+class GradedSheet:
+    line: int
+    player: str
+    role: RoleType
+    started_at: datetime | None
+    progress: Progress
+    answers: list[tuple[int, str, bool]]
+    ignored: int = 0
+
+
+@dataclass
+class GradedChunk:
+    sheets: list[GradedSheet] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass
+class GradingReport:
+    read: int = 0
+    graded: int = 0
+    invalid: int = 0
+    answers: int = 0
+    correct: int = 0
+    ignored: int = 0
+    errors: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def sheets_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def build_answer_key(connection: Connection) -> bytes:
+    rows = connection.execute(select(Question.id, Question.correct_choice)).all()
+    key = bytearray(max((question_id for question_id, _ in rows), default=0) + 1)
+    for question_id, correct_choice in rows:
+        key[question_id] = ord(correct_choice)
+    return bytes(key)
+
+
+def _parse_role(value: Any) -> RoleType:
+    if isinstance(value, str):
+        if value in RoleType.__members__:
+            return RoleType[value]
+        try:
+            return RoleType(value)
+        except ValueError:
+            pass
+    raise SheetValidationError(f"rôle inconnu : {value!r}")
+
+
+def _parse_answer(raw: Any) -> tuple[Any, Any]:
+    if isinstance(raw, dict):
+        return raw.get("question_id"), raw.get("selected")
+    if isinstance(raw, (list, tuple)) and len(raw) == 2:
+        return raw[0], raw[1]
+    raise SheetValidationError("réponse attendue sous la forme {question_id, selected}")
+
+
+def grade_sheet(
+    raw: Any, line: int, answer_key: bytes, stage_max: int = STAGE_MAX
+) -> GradedSheet:
+    if not isinstance(raw, dict):
+        raise SheetValidationError("objet JSON attendu")
+    player = raw.get("player")
+    if not isinstance(player, str) or not player.strip():
+        raise SheetValidationError("champ player manquant")
+    player = player.strip()
+    if len(player) > PLAYER_NAME_MAX_LENGTH:
+        raise SheetValidationError("champ player trop long")
+    role = _parse_role(raw.get("role"))
+    started_at = None
+    if raw.get("started_at") is not None:
+        try:
+            started_at = datetime.fromisoformat(raw["started_at"])
+        except (TypeError, ValueError) as exc:
+            raise SheetValidationError("champ started_at invalide") from exc
+    answers = raw.get("answers")
+    if not isinstance(answers, list):
+        raise SheetValidationError("champ answers manquant")
+    sheet = GradedSheet(line, player, role, started_at, Progress(), [])
+    for raw_answer in answers:
+        question_id, selected = _parse_answer(raw_answer)
+        if isinstance(question_id, bool) or not isinstance(question_id, int):
+            raise SheetValidationError(f"question_id invalide : {question_id!r}")
+        if not 0 < question_id < len(answer_key) or not answer_key[question_id]:
+            raise SheetValidationError(f"question inconnue : {question_id}")
+        if not isinstance(selected, str) or len(selected.strip()) > 1:
+            raise SheetValidationError(f"choix invalide : {selected!r}")
+        if sheet.progress.completed:
+            sheet.ignored += 1
+            continue
+        selected = selected.strip().upper()
+        is_correct = selected == chr(answer_key[question_id])
+        apply_answer(sheet.progress, is_correct, stage_max)
+        sheet.answers.append((question_id, selected, is_correct))
+    return sheet
+
+
+def grade_chunk(
+    lines: list[tuple[int, str]], answer_key: bytes, stage_max: int = STAGE_MAX
+) -> GradedChunk:
+    chunk = GradedChunk()
+    for line_number, text in lines:
+        if not text.strip():
+            continue
+        try:
+            chunk.sheets.append(grade_sheet(json.loads(text), line_number, answer_key, stage_max))
+        except json.JSONDecodeError:
+            chunk.errors.append(f"ligne {line_number} : JSON invalide")
+        except SheetValidationError as exc:
+            chunk.errors.append(f"ligne {line_number} : {exc}")
+    return chunk
+
+
+_worker_answer_key = b""
+_worker_stage_max = STAGE_MAX
+
+
+def _init_worker(answer_key: bytes, stage_max: int) -> None:
+    global _worker_answer_key, _worker_stage_max
+    _worker_answer_key = answer_key
+    _worker_stage_max = stage_max
+
+
+def _grade_in_worker(lines: list[tuple[int, str]]) -> GradedChunk:
+    return grade_chunk(lines, _worker_answer_key, _worker_stage_max)
+
+
+def _numbered_chunks(lines: Iterable[str], size: int) -> Iterator[list[tuple[int, str]]]:
+    numbered = enumerate(lines, start=1)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ordered_map(
+    executor: Executor, function: Callable[[T], R], items: Iterable[T], window: int
+) -> Iterator[R]:
+    in_flight: deque[Future] = deque()
+    for item in items:
+        in_flight.append(executor.submit(function, item))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def _store_chunk(
+    connection: Connection, sheets: list[GradedSheet], graded_at: datetime
+) -> None:
+    roles: dict[str, RoleType] = {}
+    for sheet in sheets:
+        roles[sheet.player] = sheet.role
+    player_ids = dict(
+        connection.execute(
+            select(Player.name, Player.id).where(
+                Player.name.in_(bindparam("names", expanding=True))
+            ),
+            {"names": list(roles)},
+        ).all()
+    )
+    existing = [name for name in roles if name in player_ids]
+    if existing:
+        connection.execute(
+            update(Player)
+            .where(Player.id == bindparam("player_id"))
+            .values(role=bindparam("new_role")),
+            [{"player_id": player_ids[name], "new_role": roles[name]} for name in existing],
+        )
+    new_players = [name for name in roles if name not in player_ids]
+    if new_players:
+        inserted = connection.execute(
+            insert(Player).returning(Player.id, sort_by_parameter_order=True),
+            [{"name": name, "role": roles[name], "created_at": graded_at} for name in new_players],
+        )
+        player_ids.update(zip(new_players, inserted.scalars(), strict=True))
+    session_rows = [
+        {
+            "player_id": player_ids[sheet.player],
+            "started_at": sheet.started_at or graded_at,
+            "completed": sheet.progress.completed,
+            "stage": sheet.progress.stage,
+            "score": sheet.progress.score,
+            "streak": sheet.progress.streak,
+            "correct_answers": sheet.progress.correct_answers,
+            "total_answers": sheet.progress.total_answers,
+        }
+        for sheet in sheets
+    ]
+    session_ids = list(
+        connection.execute(
+            insert(GameSession).returning(GameSession.id, sort_by_parameter_order=True),
+            session_rows,
+        ).scalars()
+    )
+    answer_rows = [
+        {
+            "session_id": session_id,
+            "question_id": question_id,
+            "selected": selected,
+            "is_correct": is_correct,
+            "answered_at": row["started_at"],
+        }
+        for sheet, session_id, row in zip(sheets, session_ids, session_rows, strict=True)
+        for question_id, selected, is_correct in sheet.answers
+    ]
+    if answer_rows:
+        connection.execute(insert(AnswerLog), answer_rows)
+    scores = [
+        {
+            "player_id": row["player_id"],
+            "session_id": session_id,
+            "score": row["score"],
+            "started_at": row["started_at"],
+        }
+        for session_id, row in zip(session_ids, session_rows, strict=True)
+    ]
+    best: dict[int, dict[str, Any]] = {}
+    for score in scores:
+        current = best.get(score["player_id"])
+        if current is None or score["score"] > current["score"]:
+            best[score["player_id"]] = score
+    connection.execute(best_score_upsert(), list(best.values()))
+    connection.execute(period_best_upsert(), period_best_rows(scores))
+
+
+def grade_sheets(
+    lines: Iterable[str], workers: int | None = None, chunk_size: int = GRADE_CHUNK_SIZE
+) -> GradingReport:
+    started = time.perf_counter()
+    report = GradingReport()
+    graded_at = utc_now()
+    engine = get_engine()
+    with engine.connect() as connection:
+        answer_key = build_answer_key(connection)
+    workers = workers or os.cpu_count() or 1
+    chunks = _numbered_chunks(lines, chunk_size)
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(answer_key, STAGE_MAX)
+        )
+        results = ordered_map(executor, _grade_in_worker, chunks, workers * 2)
+    else:
+        results = (grade_chunk(chunk, answer_key) for chunk in chunks)
+    try:
+        for chunk in results:
+            report.read += len(chunk.sheets) + len(chunk.errors)
+            report.invalid += len(chunk.errors)
+            for error in chunk.errors:
+                if len(report.errors) < MAX_REPORTED_ERRORS:
+                    report.errors.append(error)
+            if not chunk.sheets:
+                continue
+            with engine.begin() as connection:
+                _store_chunk(connection, chunk.sheets, graded_at)
+            report.graded += len(chunk.sheets)
+            for sheet in chunk.sheets:
+                report.answers += len(sheet.answers)
+                report.correct += sheet.progress.correct_answers
+                report.ignored += sheet.ignored
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def grade_file(
+    path: Path, workers: int | None = None, chunk_size: int = GRADE_CHUNK_SIZE
+) -> GradingReport:
+    with path.open(encoding="utf-8") as handle:
+        return grade_sheets(handle, workers, chunk_size)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Corrige des feuilles de réponses (JSONL)")
+    parser.add_argument("paths", type=Path, nargs="+")
+    parser.add_argument("--db", help="Chemin de la base SQLite")
+    parser.add_argument(
+        "--engine-profile", choices=list(ENGINE_PROFILES), help="Réglages SQLite à appliquer"
+    )
+    parser.add_argument("--workers", type=int, help="Processus de correction (1 = sans pool)")
+    parser.add_argument("--chunk-size", type=int, default=GRADE_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    if args.db or args.engine_profile:
+        configure_database(args.db, args.engine_profile)
+    init_db(seed_questions)
+    for path in args.paths:
+        report = grade_file(path, args.workers, args.chunk_size)
+        for error in report.errors:
+            print(f"{path.name} {error}")
+        print(
+            f"{path.name} : {report.read} feuilles lues, {report.graded} corrigées, "
+            f"{report.invalid} invalides, {report.correct}/{report.answers} bonnes réponses, "
+            f"{report.ignored} réponses après la fin ignorées "
+            f"({report.sheets_per_second:.0f} feuilles/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,84 @@
 from __future__ import annotations
 
+import queue
 import tkinter as tk
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
 from tkinter import messagebox, ttk
+from typing import Any
 
-from .models import ROLE_PERKS, RoleType
-from .pdf_export import export_scores
+from .exports import export_scores
+from .models import ROLE_PERKS, LeaderboardWindow, RoleType
 from .services import GameService, SessionState
 
+LEADERBOARD_WINDOWS: dict[str, LeaderboardWindow | None] = {
+    "Depuis toujours": None,
+    "Aujourd'hui": LeaderboardWindow.DAY,
+    "Cette semaine": LeaderboardWindow.WEEK,
+    "Cette saison": LeaderboardWindow.SEASON,
+}
+
+
+class ServiceExecutor:
+    POLL_MS = 30
+
+    def __init__(self, root: tk.Misc, on_busy_change: Callable[[bool], None]) -> None:
+        self._root = root
+        self._on_busy_change = on_busy_change
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clavierdor-ui")
+        self._results: queue.Queue[tuple[str, Future, Callable[[Any], None]]] = queue.Queue()
+        self._in_flight: set[str] = set()
+        self._polling = False
+        self._closed = False
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._in_flight)
+
+    def submit(self, key: str, call: Callable[[], Any], on_success: Callable[[Any], None]) -> bool:
+        if self._closed or key in self._in_flight:
+            return False
+        if not self._in_flight:
+            self._on_busy_change(True)
+        self._in_flight.add(key)
+        future = self._executor.submit(call)
+        future.add_done_callback(lambda done: self._results.put((key, done, on_success)))
+        self._schedule_poll()
+        return True
+
+    def shutdown(self) -> None:
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self) -> None:
+        if not self._polling:
+            self._polling = True
+            self._root.after(self.POLL_MS, self._poll)
+
+    def _poll(self) -> None:
+        self._polling = False
+        try:
+            while True:
+                try:
+                    key, future, on_success = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._in_flight.discard(key)
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if error is None:
+                    on_success(future.result())
+                elif not self._closed:
+                    messagebox.showerror("Erreur", str(error))
+        finally:
+            if self._in_flight or not self._results.empty():
+                self._schedule_poll()
+            else:
+                self._on_busy_change(False)
+
 
 class ClavierDorApp(tk.Tk):
     def __init__(self) -> None:
@@ -25,8 +96,35 @@ class ClavierDorApp(tk.Tk):
         self.accuracy_text = tk.StringVar(value="Précision : 0%")
         self.progress_text = tk.StringVar(value="Progression : 0/4")
         self.theme = tk.StringVar(value="clair")
+        self.leaderboard_window = tk.StringVar(value=next(iter(LEADERBOARD_WINDOWS)))
+        self.busy_text = tk.StringVar(value="")
+        self.closing = False
+        self.executor = ServiceExecutor(self, self._set_busy)
 
         self._build_layout()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _set_busy(self, busy: bool) -> None:
+        if self.closing:
+            return
+        self.busy_text.set("Traitement en cours…" if busy else "")
+        self.configure(cursor="watch" if busy else "")
+
+    def _on_close(self) -> None:
+        if self.closing:
+            return
+        self.closing = True
+        self.busy_text.set("Fermeture en cours…")
+        self.configure(cursor="watch")
+        self.executor.shutdown()
+        self._finish_close()
+
+    def _finish_close(self) -> None:
+        if self.executor.busy:
+            self.after(ServiceExecutor.POLL_MS, self._finish_close)
+            return
+        self.service.close()
+        self.destroy()
 
     def _build_layout(self) -> None:
         header = tk.Frame(self, bg="#1f2a44", pady=12)
@@ -139,6 +237,9 @@ class ClavierDorApp(tk.Tk):
         tk.Label(frame, textvariable=self.progress_text, bg="#f5f7fb").pack(
             anchor="w", padx=10, pady=4
         )
+        tk.Label(frame, textvariable=self.busy_text, bg="#f5f7fb", fg="#8a5a00").pack(
+            anchor="w", padx=10, pady=4
+        )
 
         self.progress_bar = ttk.Progressbar(frame, maximum=self.service.STAGE_MAX, length=260)
         self.progress_bar.pack(anchor="w", padx=10, pady=6)
@@ -155,6 +256,12 @@ class ClavierDorApp(tk.Tk):
         tk.Button(panel, text="Historique", command=self.show_history).pack(
             fill=tk.X, padx=10, pady=6
         )
+        ttk.Combobox(
+            panel,
+            textvariable=self.leaderboard_window,
+            values=list(LEADERBOARD_WINDOWS),
+            state="readonly",
+        ).pack(fill=tk.X, padx=10, pady=6)
         tk.Button(panel, text="Classement", command=self.show_leaderboard).pack(
             fill=tk.X, padx=10, pady=6
         )
@@ -232,61 +339,107 @@ class ClavierDorApp(tk.Tk):
             messagebox.showwarning("Nom manquant", "Veuillez renseigner votre nom.")
             return
         role = RoleType(self.role_choice.get())
-        self.state = self.service.start_new_game(name, role)
-        self.status_text.set(f"Bonne chance {name} !")
-        self.hint_text.set("")
-        self._update_ui()
+
+        def started(state: SessionState) -> None:
+            self.state = state
+            self.status_text.set(f"Bonne chance {name} !")
+            self.hint_text.set("")
+            self._update_ui()
+
+        self.executor.submit("game", lambda: self.service.start_new_game(name, role), started)
 
     def resume_game(self) -> None:
         name = self.player_name.get().strip()
         if not name:
             messagebox.showwarning("Nom manquant", "Veuillez renseigner votre nom.")
             return
-        state = self.service.resume_last_game(name)
-        if state is None:
-            messagebox.showinfo("Info", "Aucune partie sauvegardée pour ce joueur.")
-            return
-        self.state = state
-        self.status_text.set("Partie reprise.")
-        self._update_ui()
+
+        def resumed(state: SessionState | None) -> None:
+            if state is None:
+                messagebox.showinfo("Info", "Aucune partie sauvegardée pour ce joueur.")
+                return
+            self.state = state
+            self.status_text.set("Partie reprise.")
+            self._update_ui()
+
+        self.executor.submit("game", lambda: self.service.resume_last_game(name), resumed)
 
     def submit_answer(self, choice: str) -> None:
         if self.state is None or self.state.current_question is None:
             return
-        self.state = self.service.submit_answer(
-            self.state.session_id, self.state.current_question.id, choice
+        session_id = self.state.session_id
+        question_id = self.state.current_question.id
+
+        def answered(state: SessionState) -> None:
+            self.state = state
+            feedback = "Bonne réponse !" if state.streak > 0 else "Réponse enregistrée."
+            self.status_text.set(feedback)
+            self.hint_text.set("")
+            self._update_ui()
+
+        self.executor.submit(
+            "play", lambda: self.service.submit_answer(session_id, question_id, choice), answered
         )
-        feedback = "Bonne réponse !" if self.state.streak > 0 else "Réponse enregistrée."
-        self.status_text.set(feedback)
-        self.hint_text.set("")
-        self._update_ui()
 
     def use_perk(self) -> None:
         if self.state is None:
             return
+        session_id = self.state.session_id
         if self.state.role == RoleType.FRONT:
             question_id = (
                 self.state.current_question.id if self.state.current_question else None
             )
-            self.state = self.service.use_front_joker(self.state.session_id, question_id)
-            self.status_text.set("Joker Front utilisé : question changée !")
+            message = "Joker Front utilisé : question changée !"
+            self.executor.submit(
+                "play",
+                lambda: self.service.use_front_joker(session_id, question_id),
+                lambda state: self._perk_applied(state, message),
+            )
         elif self.state.role == RoleType.BACK:
-            self.state = self.service.use_back_joker(self.state.session_id)
-            self.status_text.set("Joker Back utilisé : rattrapage appliqué.")
+            message = "Joker Back utilisé : rattrapage appliqué."
+            self.executor.submit(
+                "play",
+                lambda: self.service.use_back_joker(session_id),
+                lambda state: self._perk_applied(state, message),
+            )
         else:
-            hint = self.service.use_mobile_joker(self.state.session_id)
-            self.hint_text.set(f"Indice : {hint}")
-            self.status_text.set("Joker Mobile utilisé.")
+
+            def hinted(hint: str) -> None:
+                self.hint_text.set(f"Indice : {hint}")
+                self.status_text.set("Joker Mobile utilisé.")
+                self._update_ui()
+
+            self.executor.submit("play", lambda: self.service.use_mobile_joker(session_id), hinted)
+
+    def _perk_applied(self, state: SessionState, message: str) -> None:
+        self.state = state
+        self.status_text.set(message)
         self._update_ui()
 
     def export_pdf(self) -> None:
-        scores = self.service.list_scores()
-        if not scores:
-            messagebox.showinfo("Export", "Aucun score à exporter.")
-            return
         path = Path.home() / ".clavierdor" / "classement.pdf"
-        export_scores(path, scores)
-        messagebox.showinfo("Export", f"PDF exporté vers {path}")
+        label = self.leaderboard_window.get()
+        window = LEADERBOARD_WINDOWS[label]
+
+        def export() -> Path | None:
+            if window is None:
+                scores = self.service.iter_scores()
+                title = None
+            else:
+                scores = self.service.iter_leaderboard(window)
+                title = f"Classement - {label}"
+            first = next(scores, None)
+            if first is None:
+                return None
+            return export_scores(path, chain([first], scores), title=title)
+
+        def exported(result: Path | None) -> None:
+            if result is None:
+                messagebox.showinfo("Export", "Aucun score à exporter.")
+                return
+            messagebox.showinfo("Export", f"PDF exporté vers {result}")
+
+        self.executor.submit("export", export, exported)
 
     def save_game(self) -> None:
         if self.state is None:
@@ -300,26 +453,38 @@ class ClavierDorApp(tk.Tk):
         if not name:
             messagebox.showwarning("Nom manquant", "Veuillez renseigner votre nom.")
             return
-        history = self.service.list_history(name)
-        if not history:
-            messagebox.showinfo("Historique", "Aucune partie enregistrée.")
-            return
-        lines = [
-            f"{item.started_at:%d/%m/%Y %H:%M} - Score {item.score} - Étape {item.stage}"
-            for item in history
-        ]
-        messagebox.showinfo("Historique", "\n".join(lines))
+
+        def loaded(history: list) -> None:
+            if not history:
+                messagebox.showinfo("Historique", "Aucune partie enregistrée.")
+                return
+            lines = [
+                f"{item.started_at:%d/%m/%Y %H:%M} - Score {item.score} - Étape {item.stage}"
+                for item in history
+            ]
+            messagebox.showinfo("Historique", "\n".join(lines))
+
+        self.executor.submit("history", lambda: self.service.list_history(name), loaded)
 
     def show_leaderboard(self) -> None:
-        scores = self.service.list_scores()
-        if not scores:
-            messagebox.showinfo("Classement", "Aucun score enregistré.")
-            return
-        lines = [
-            f"{index + 1}. {name} - {score} pts ({started_at:%d/%m/%Y})"
-            for index, (name, score, started_at) in enumerate(scores[:10])
-        ]
-        messagebox.showinfo("Classement", "\n".join(lines))
+        label = self.leaderboard_window.get()
+        window = LEADERBOARD_WINDOWS[label]
+
+        def loaded(entries: list) -> None:
+            title = f"Classement - {label}"
+            if not entries:
+                messagebox.showinfo(title, "Aucun score enregistré.")
+                return
+            lines = [
+                f"{index + 1}. {entry.player_name} - {entry.score} pts "
+                f"({entry.started_at:%d/%m/%Y})"
+                for index, entry in enumerate(entries)
+            ]
+            messagebox.showinfo(title, "\n".join(lines))
+
+        self.executor.submit(
+            "leaderboard", lambda: self.service.leaderboard(10, window=window).entries, loaded
+        )
 
     def toggle_theme(self) -> None:
         if self.theme.get() == "clair":
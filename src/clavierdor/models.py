@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from enum import Enum
+from random import getrandbits
 
 from sqlalchemy import (
     Boolean,
     DateTime,
     Enum as SqlEnum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -26,13 +29,31 @@ class RoleType(str, Enum):
     MOBILE = "Développeur Mobile"
 
 
+class LeaderboardWindow(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    SEASON = "season"
+
+
+def utc_now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def leaderboard_bucket(window: LeaderboardWindow, moment: datetime) -> str:
+    if window is LeaderboardWindow.DAY:
+        return moment.date().isoformat()
+    if window is LeaderboardWindow.WEEK:
+        return (moment.date() - timedelta(days=moment.weekday())).isoformat()
+    return f"{moment.year}-S{(moment.month + 2) // 3}"
+
+
 class Player(Base):
     __tablename__ = "players"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(120), unique=True, nullable=False)
     role: Mapped[RoleType] = mapped_column(SqlEnum(RoleType), nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
 
     sessions: Mapped[list["GameSession"]] = relationship(
         back_populates="player", cascade="all, delete-orphan"
@@ -41,10 +62,15 @@ class Player(Base):
 
 class GameSession(Base):
     __tablename__ = "game_sessions"
+    __table_args__ = (
+        Index("ix_game_sessions_player_started", "player_id", "started_at"),
+        Index("ix_game_sessions_started_at", "started_at"),
+        Index("ix_game_sessions_score", "score", "started_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     player_id: Mapped[int] = mapped_column(ForeignKey("players.id"))
-    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
     completed: Mapped[bool] = mapped_column(Boolean, default=False)
     stage: Mapped[int] = mapped_column(Integer, default=1)
     score: Mapped[int] = mapped_column(Integer, default=0)
@@ -52,6 +78,12 @@ class GameSession(Base):
     front_joker_used: Mapped[bool] = mapped_column(Boolean, default=False)
     back_joker_used: Mapped[bool] = mapped_column(Boolean, default=False)
     mobile_joker_used: Mapped[bool] = mapped_column(Boolean, default=False)
+    deck_seed: Mapped[int | None] = mapped_column(Integer, default=lambda: getrandbits(31))
+    deck_offset: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    correct_answers: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_answers: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    archived_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    current_question_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     player: Mapped[Player] = relationship(back_populates="sessions")
     answers: Mapped[list["AnswerLog"]] = relationship(
@@ -61,6 +93,10 @@ class GameSession(Base):
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_stage", "stage"),
+        Index("ix_questions_content_hash", "content_hash"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     prompt: Mapped[str] = mapped_column(Text, nullable=False)
@@ -71,17 +107,113 @@ class Question(Base):
     correct_choice: Mapped[str] = mapped_column(String(1), nullable=False)
     stage: Mapped[int] = mapped_column(Integer, default=1)
     hint: Mapped[str] = mapped_column(String(200), default="")
+    content_hash: Mapped[str | None] = mapped_column(String(32))
+
+
+class PlayerBestScore(Base):
+    __tablename__ = "player_best_scores"
+    __table_args__ = (Index("ix_player_best_scores_rank", "score", "started_at", "session_id"),)
+
+    player_id: Mapped[int] = mapped_column(ForeignKey("players.id"), primary_key=True)
+    session_id: Mapped[int] = mapped_column(ForeignKey("game_sessions.id"))
+    score: Mapped[int] = mapped_column(Integer, default=0)
+    started_at: Mapped[datetime] = mapped_column(DateTime)
+
+    player: Mapped[Player] = relationship()
+
+
+class PeriodBestScore(Base):
+    __tablename__ = "period_best_scores"
+    __table_args__ = (
+        Index(
+            "ix_period_best_scores_rank", "window", "bucket", "score", "started_at", "session_id"
+        ),
+    )
+
+    window: Mapped[LeaderboardWindow] = mapped_column(
+        SqlEnum(LeaderboardWindow), primary_key=True
+    )
+    bucket: Mapped[str] = mapped_column(String(10), primary_key=True)
+    player_id: Mapped[int] = mapped_column(ForeignKey("players.id"), primary_key=True)
+    session_id: Mapped[int] = mapped_column(ForeignKey("game_sessions.id"))
+    score: Mapped[int] = mapped_column(Integer, default=0)
+    started_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class QuestionBankVersion(Base):
+    __tablename__ = "question_bank_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class QuestionChange(Base):
+    __tablename__ = "question_changes"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    question_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class QuestionStat(Base):
+    __tablename__ = "question_stats"
+
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    correct: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class GroupStat(Base):
+    __tablename__ = "group_stats"
+
+    dimension: Mapped[str] = mapped_column(String(16), primary_key=True)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    correct: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class JokerStat(Base):
+    __tablename__ = "joker_stats"
+
+    joker: Mapped[str] = mapped_column(String(16), primary_key=True)
+    used: Mapped[bool] = mapped_column(Boolean, primary_key=True)
+    sessions: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[int] = mapped_column(Integer, default=0)
+    total_score: Mapped[int] = mapped_column(Integer, default=0)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    correct: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class StatsWatermark(Base):
+    __tablename__ = "stats_watermarks"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    last_answer_id: Mapped[int] = mapped_column(Integer, default=0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
+
+
+def question_content_hash(
+    prompt: str, choice_a: str, choice_b: str, choice_c: str, choice_d: str
+) -> str:
+    content = "\x1f".join(
+        " ".join(part.split()).casefold()
+        for part in (prompt, choice_a, choice_b, choice_c, choice_d)
+    )
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
 
 
 class AnswerLog(Base):
     __tablename__ = "answer_logs"
+    __table_args__ = (
+        Index("ix_answer_logs_session_answered", "session_id", "answered_at"),
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     session_id: Mapped[int] = mapped_column(ForeignKey("game_sessions.id"))
     question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"))
     selected: Mapped[str] = mapped_column(String(1), nullable=False)
     is_correct: Mapped[bool] = mapped_column(Boolean, default=False)
-    answered_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    answered_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
 
     session: Mapped[GameSession] = relationship(back_populates="answers")
 
@@ -1,22 +1,569 @@
 from __future__ import annotations
 
+import json
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, fields, replace
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import (
+    Connection,
+    Engine,
+    Executable,
+    bindparam,
+    create_engine,
+    delete,
+    event,
+    func,
+    inspect,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateColumn
 
-from .models import Base
+from .models import (
+    AnswerLog,
+    Base,
+    GameSession,
+    GroupStat,
+    JokerStat,
+    LeaderboardWindow,
+    PeriodBestScore,
+    PlayerBestScore,
+    Question,
+    QuestionBankVersion,
+    QuestionChange,
+    QuestionStat,
+    StatsWatermark,
+    question_content_hash,
+)
+from .profiling import QueryProfiler, active_profiler, set_active_profiler
+from .search import SEARCH_COLUMNS, SEARCH_TABLE, SEARCH_WEIGHTS
 
-DB_PATH = Path.home() / ".clavierdor" / "clavierdor.db"
-DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
-ENGINE = create_engine(f"sqlite:///{DB_PATH}", future=True)
-SessionLocal = sessionmaker(bind=ENGINE, autoflush=False, future=True)
+DB_PATH_ENV = "CLAVIERDOR_DB"
+DEFAULT_DB_PATH = Path.home() / ".clavierdor" / "clavierdor.db"
+ENGINE_PROFILE_ENV = "CLAVIERDOR_ENGINE_PROFILE"
+CONFIG_PATH_ENV = "CLAVIERDOR_CONFIG"
+DEFAULT_CONFIG_PATH = Path.home() / ".clavierdor" / "config.json"
+MEMORY_DB = ":memory:"
 
 
-def init_db() -> None:
-    Base.metadata.create_all(ENGINE)
+@dataclass(frozen=True)
+class EngineProfile:
+    name: str
+    journal_mode: str = "DELETE"
+    synchronous: str = "FULL"
+    cache_size: int = -2000
+    mmap_size: int = 0
+    busy_timeout_ms: int = 5000
+    pool_size: int = 5
+    max_overflow: int = 10
+
+    def pragmas(self) -> dict[str, str | int]:
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size": self.cache_size,
+            "mmap_size": self.mmap_size,
+            "busy_timeout": self.busy_timeout_ms,
+        }
+
+
+ENGINE_PROFILES = {
+    "compat": EngineProfile("compat"),
+    "wal": EngineProfile(
+        "wal",
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size=-65536,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout_ms=10000,
+        pool_size=20,
+        max_overflow=0,
+    ),
+    "unsafe": EngineProfile(
+        "unsafe",
+        journal_mode="WAL",
+        synchronous="OFF",
+        cache_size=-65536,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout_ms=10000,
+        pool_size=20,
+        max_overflow=0,
+    ),
+}
+DEFAULT_ENGINE_PROFILE = "wal"
+
+_db_path: Path | None = None
+_engine_profile: EngineProfile | None = None
+_engine: Engine | None = None
+_session_factory: sessionmaker[Session] | None = None
+_engine_lock = threading.Lock()
+
+BACKFILL_ANSWER_COUNTERS = """
+UPDATE game_sessions SET
+    total_answers = (
+        SELECT COUNT(*) FROM answer_logs WHERE answer_logs.session_id = game_sessions.id
+    ),
+    correct_answers = (
+        SELECT COUNT(*) FROM answer_logs
+        WHERE answer_logs.session_id = game_sessions.id AND answer_logs.is_correct = 1
+    )
+"""
+
+BACKFILL_PLAYER_BEST_SCORES = """
+INSERT OR REPLACE INTO player_best_scores (player_id, session_id, score, started_at)
+SELECT player_id, id, score, started_at FROM (
+    SELECT
+        player_id, id, score, started_at,
+        ROW_NUMBER() OVER (
+            PARTITION BY player_id ORDER BY score DESC, started_at DESC, id DESC
+        ) AS rank
+    FROM game_sessions
+)
+WHERE rank = 1
+"""
+
+PERIOD_BUCKET_SQL = {
+    LeaderboardWindow.DAY: "date(started_at)",
+    LeaderboardWindow.WEEK: "date(started_at, '-6 days', 'weekday 1')",
+    LeaderboardWindow.SEASON: (
+        "strftime('%Y', started_at) || '-S' || "
+        "((CAST(strftime('%m', started_at) AS INTEGER) + 2) / 3)"
+    ),
+}
+
+BACKFILL_PERIOD_BEST_SCORES = """
+INSERT OR REPLACE INTO period_best_scores
+    (window, bucket, player_id, session_id, score, started_at)
+SELECT :window, bucket, player_id, id, score, started_at FROM (
+    SELECT
+        {bucket} AS bucket, player_id, id, score, started_at,
+        ROW_NUMBER() OVER (
+            PARTITION BY player_id, {bucket} ORDER BY score DESC, started_at DESC, id DESC
+        ) AS rank
+    FROM game_sessions
+)
+WHERE rank = 1
+"""
+
+
+def _add_column(connection: Connection, table_name: str, column_name: str) -> bool:
+    existing = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    if column_name in existing:
+        return False
+    column = Base.metadata.tables[table_name].columns[column_name]
+    definition = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {definition}"))
+    return True
+
+
+def _migrate_session_decks_and_counters(connection: Connection) -> None:
+    _add_column(connection, "game_sessions", "deck_seed")
+    _add_column(connection, "game_sessions", "deck_offset")
+    added_correct = _add_column(connection, "game_sessions", "correct_answers")
+    added_total = _add_column(connection, "game_sessions", "total_answers")
+    if added_correct or added_total:
+        connection.execute(text(BACKFILL_ANSWER_COUNTERS))
+
+
+def _create_index(connection: Connection, model: type[Base], name: str) -> None:
+    index = next(index for index in model.__table__.indexes if index.name == name)
+    index.create(connection, checkfirst=True)
+
+
+def _migrate_hot_path_indexes(connection: Connection) -> None:
+    _create_index(connection, GameSession, "ix_game_sessions_player_started")
+    _create_index(connection, GameSession, "ix_game_sessions_started_at")
+    _create_index(connection, GameSession, "ix_game_sessions_score")
+    _create_index(connection, Question, "ix_questions_stage")
+    _create_index(connection, AnswerLog, "ix_answer_logs_session_answered")
+
+
+def _migrate_player_best_scores(connection: Connection) -> None:
+    PlayerBestScore.__table__.create(connection, checkfirst=True)
+    connection.execute(text(BACKFILL_PLAYER_BEST_SCORES))
+
+
+def _migrate_question_content_hash(connection: Connection) -> None:
+    _add_column(connection, "questions", "content_hash")
+    rows = connection.execute(
+        select(
+            Question.id,
+            Question.prompt,
+            Question.choice_a,
+            Question.choice_b,
+            Question.choice_c,
+            Question.choice_d,
+        ).where(Question.content_hash.is_(None))
+    ).all()
+    if rows:
+        connection.execute(
+            update(Question)
+            .where(Question.id == bindparam("question_id"))
+            .values(content_hash=bindparam("hash")),
+            [{"question_id": row[0], "hash": question_content_hash(*row[1:])} for row in rows],
+        )
+    _create_index(connection, Question, "ix_questions_content_hash")
+
+
+def _migrate_answer_archive(connection: Connection) -> None:
+    _add_column(connection, "game_sessions", "archived_at")
+
+
+def _migrate_statistics_tables(connection: Connection) -> None:
+    for model in (QuestionStat, GroupStat, JokerStat, StatsWatermark):
+        model.__table__.create(connection, checkfirst=True)
+
+
+def _migrate_question_bank_version(connection: Connection) -> None:
+    QuestionBankVersion.__table__.create(connection, checkfirst=True)
+    connection.execute(
+        text("INSERT OR IGNORE INTO question_bank_version (id, version) VALUES (1, 1)")
+    )
+    for event_name in ("INSERT", "UPDATE", "DELETE"):
+        connection.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS questions_version_{event_name.lower()} "
+                f"AFTER {event_name} ON questions BEGIN "
+                "UPDATE question_bank_version SET version = version + 1 WHERE id = 1; END"
+            )
+        )
+
+
+def _migrate_period_best_scores(connection: Connection) -> None:
+    PeriodBestScore.__table__.create(connection, checkfirst=True)
+    for window, bucket in PERIOD_BUCKET_SQL.items():
+        connection.execute(
+            text(BACKFILL_PERIOD_BEST_SCORES.format(bucket=bucket)), {"window": window.name}
+        )
+
+
+def _migrate_question_changes(connection: Connection) -> None:
+    QuestionChange.__table__.create(connection, checkfirst=True)
+    for event_name, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        trigger = f"questions_version_{event_name.lower()}"
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        connection.execute(
+            text(
+                f"CREATE TRIGGER {trigger} AFTER {event_name} ON questions BEGIN "
+                "UPDATE question_bank_version SET version = version + 1 WHERE id = 1; "
+                "INSERT INTO question_changes (version, question_id) "
+                f"SELECT version, {row}.id FROM question_bank_version WHERE id = 1; END"
+            )
+        )
+
+
+def _migrate_question_search(connection: Connection) -> None:
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+    connection.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5({columns}, "
+            "content='questions', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+    )
+    connection.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE}_vocab "
+            f"USING fts5vocab({SEARCH_TABLE}, 'row')"
+        )
+    )
+    insert_row = f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});"
+    delete_row = (
+        f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    for event_name, body in (
+        ("INSERT", insert_row),
+        ("UPDATE", delete_row + " " + insert_row),
+        ("DELETE", delete_row),
+    ):
+        connection.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS questions_search_{event_name.lower()} "
+                f"AFTER {event_name} ON questions BEGIN {body} END"
+            )
+        )
+    weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+    connection.execute(
+        text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', :rank)"),
+        {"rank": f"bm25({weights})"},
+    )
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+def _migrate_session_current_question(connection: Connection) -> None:
+    _add_column(connection, "game_sessions", "current_question_id")
+
+
+def _migrate_answer_log_autoincrement(connection: Connection) -> None:
+    table = AnswerLog.__table__
+    definition = connection.scalar(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": table.name},
+    )
+    if "AUTOINCREMENT" not in definition.upper():
+        columns = ", ".join(table.columns.keys())
+        connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {table.name}_old"))
+        for index in table.indexes:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        table.create(connection)
+        connection.execute(
+            text(
+                f"INSERT INTO {table.name} ({columns}) "
+                f"SELECT {columns} FROM {table.name}_old ORDER BY id"
+            )
+        )
+        connection.execute(text(f"DROP TABLE {table.name}_old"))
+    last_id = max(
+        connection.scalar(select(func.max(AnswerLog.id))) or 0,
+        connection.scalar(select(func.max(StatsWatermark.last_answer_id))) or 0,
+    )
+    connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+    connection.execute(
+        text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+        {"name": table.name, "seq": last_id},
+    )
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _migrate_session_decks_and_counters,
+    _migrate_hot_path_indexes,
+    _migrate_player_best_scores,
+    _migrate_question_content_hash,
+    _migrate_answer_archive,
+    _migrate_statistics_tables,
+    _migrate_question_bank_version,
+    _migrate_period_best_scores,
+    _migrate_question_changes,
+    _migrate_question_search,
+    _migrate_session_current_question,
+    _migrate_answer_log_autoincrement,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar_one()
+
+
+def run_migrations(connection: Connection) -> int:
+    current = schema_version(connection)
+    for migration in MIGRATIONS[current:]:
+        migration(connection)
+    if current < SCHEMA_VERSION:
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return SCHEMA_VERSION
+
+
+def question_bank_version(connection: Connection) -> int:
+    statement = select(QuestionBankVersion.version).where(QuestionBankVersion.id == 1)
+    return connection.scalar(statement) or 0
+
+
+def prune_question_changes(connection: Connection, keep: int) -> None:
+    connection.execute(
+        delete(QuestionChange).where(
+            QuestionChange.version <= question_bank_version(connection) - keep
+        )
+    )
+
+
+def explain_query_plan(connection: Connection, statement: Executable) -> list[str]:
+    compiled = statement.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return [row[-1] for row in rows]
+
+
+def configure_database(
+    path: Path | str | None = None, profile: str | EngineProfile | None = None
+) -> None:
+    global _db_path, _engine_profile, _engine, _session_factory
+    if isinstance(profile, str):
+        profile = _named_profile(profile)
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _db_path = Path(path) if path is not None else None
+        _engine_profile = profile
+        _engine = None
+        _session_factory = None
+
+
+def load_config(path: Path | None = None) -> dict[str, Any]:
+    path = path or Path(os.environ.get(CONFIG_PATH_ENV) or DEFAULT_CONFIG_PATH)
+    if not path.exists():
+        return {}
+    with path.open(encoding="utf-8") as handle:
+        config = json.load(handle)
+    database = config.get("database", {}) if isinstance(config, dict) else None
+    if not isinstance(database, dict):
+        raise TypeError(f"Section « database » invalide dans {path}")
+    return database
+
+
+def db_path() -> Path:
+    if _db_path is not None:
+        return _db_path
+    configured = os.environ.get(DB_PATH_ENV) or load_config().get("path")
+    return Path(configured).expanduser() if configured else DEFAULT_DB_PATH
+
+
+def engine_profile() -> EngineProfile:
+    if isinstance(_engine_profile, EngineProfile):
+        return _engine_profile
+    config = load_config()
+    name = os.environ.get(ENGINE_PROFILE_ENV) or config.get("profile") or DEFAULT_ENGINE_PROFILE
+    overrides = {key: value for key, value in config.items() if key not in ("path", "profile")}
+    known = {field.name for field in fields(EngineProfile)} - {"name"}
+    unknown = sorted(set(overrides) - known)
+    if unknown:
+        raise ValueError(f"Réglages de base inconnus : {', '.join(unknown)}")
+    return replace(_named_profile(name), **overrides)
+
+
+def _named_profile(name: str) -> EngineProfile:
+    try:
+        return ENGINE_PROFILES[name]
+    except KeyError:
+        choices = ", ".join(ENGINE_PROFILES)
+        raise ValueError(f"Profil de moteur inconnu : {name} (choix : {choices})") from None
+
+
+def _create_engine(path: Path, profile: EngineProfile) -> Engine:
+    if str(path) == MEMORY_DB:
+        engine = create_engine(
+            "sqlite://",
+            future=True,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        engine = create_engine(
+            f"sqlite:///{path}",
+            future=True,
+            pool_size=profile.pool_size,
+            max_overflow=profile.max_overflow,
+        )
+    _listen_pragmas(engine, profile)
+    return engine
+
+
+def _listen_pragmas(engine: Engine, profile: EngineProfile) -> None:
+    pragmas = profile.pragmas()
+
+    def apply_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+        cursor.close()
+
+    event.listen(engine, "connect", apply_pragmas)
+
+
+def create_async_db_engine(
+    path: Path | None = None, profile: EngineProfile | None = None
+) -> AsyncEngine:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    path = path or db_path()
+    profile = profile or engine_profile()
+    if str(path) == MEMORY_DB:
+        raise ValueError("Le moteur asynchrone ne partage pas une base en mémoire")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+    )
+    _listen_pragmas(engine.sync_engine, profile)
+    return engine
+
+
+def get_engine() -> Engine:
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = _create_engine(db_path(), engine_profile())
+                profiler = active_profiler()
+                if profiler is not None:
+                    _attach_profiler(engine, profiler)
+                _session_factory = sessionmaker(
+                    bind=engine, autoflush=False, expire_on_commit=False, future=True
+                )
+                _engine = engine
+    return _engine
+
+
+def _attach_profiler(engine: Engine, profiler: QueryProfiler) -> None:
+    event.listen(engine, "before_cursor_execute", profiler.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", profiler.after_cursor_execute)
+
+
+def _detach_profiler(engine: Engine, profiler: QueryProfiler) -> None:
+    event.remove(engine, "before_cursor_execute", profiler.before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", profiler.after_cursor_execute)
+
+
+def _flag_lazy_load(state: ORMExecuteState) -> None:
+    profiler = active_profiler()
+    owner, target = state.lazy_loaded_from, state.bind_mapper
+    if profiler is not None and state.is_select and owner is not None and target is not None:
+        profiler.lazy_load(f"{owner.class_.__name__} → {target.class_.__name__}")
+
+
+def enable_query_profiling(profiler: QueryProfiler | None = None) -> QueryProfiler:
+    disable_query_profiling()
+    profiler = profiler or QueryProfiler()
+    set_active_profiler(profiler)
+    if _engine is not None:
+        _attach_profiler(_engine, profiler)
+    if not event.contains(Session, "do_orm_execute", _flag_lazy_load):
+        event.listen(Session, "do_orm_execute", _flag_lazy_load)
+    return profiler
+
+
+def disable_query_profiling() -> None:
+    profiler = active_profiler()
+    if profiler is None:
+        return
+    if _engine is not None:
+        _detach_profiler(_engine, profiler)
+    set_active_profiler(None)
+
+
+def init_db(seed: Callable[[Connection], None] | None = None) -> bool:
+    engine = get_engine()
+    with engine.connect() as connection:
+        if schema_version(connection) == SCHEMA_VERSION:
+            return False
+    with engine.begin() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        if schema_version(connection) == SCHEMA_VERSION:
+            return False
+        Base.metadata.create_all(connection)
+        run_migrations(connection)
+        if seed is not None:
+            seed(connection)
+    return True
 
 
 def get_session() -> Session:
-    return SessionLocal()
+    get_engine()
+    factory = _session_factory
+    if factory is None:
+        raise RuntimeError("Base de données reconfigurée pendant l'ouverture d'une session")
+    return factory()
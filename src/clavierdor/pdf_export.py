@@ -1,24 +1,38 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from datetime import datetime
 from pathlib import Path
 
 from fpdf import FPDF
 
+DEFAULT_TITLE = "Classement - Clavier d'Or"
 
-def export_scores(path: Path, scores: list[tuple[str, int, datetime]]) -> Path:
-    pdf = FPDF()
+
+class ScoresPDF(FPDF):
+    def __init__(self, heading: str = DEFAULT_TITLE) -> None:
+        super().__init__()
+        self.heading = heading
+
+    def header(self) -> None:
+        if self.page_no() == 1:
+            self.set_font("Helvetica", size=16)
+            self.cell(0, 10, self.heading, ln=True)
+            self.set_font("Helvetica", size=12)
+            self.cell(0, 8, f"Exporté le {datetime.now():%d/%m/%Y %H:%M}", ln=True)
+            self.ln(6)
+
+        self.set_font("Helvetica", size=12)
+        self.cell(80, 8, "Joueur", border=1)
+        self.cell(40, 8, "Score", border=1)
+        self.cell(60, 8, "Date", border=1, ln=True)
+
+
+def export_scores(
+    path: Path, scores: Iterable[tuple[str, int, datetime]], title: str | None = None
+) -> Path:
+    pdf = ScoresPDF(title or DEFAULT_TITLE)
     pdf.add_page()
-    pdf.set_font("Helvetica", size=16)
-    pdf.cell(0, 10, "Classement - Clavier d'Or", ln=True)
-    pdf.set_font("Helvetica", size=12)
-    pdf.cell(0, 8, f"Exporté le {datetime.now():%d/%m/%Y %H:%M}", ln=True)
-    pdf.ln(6)
-
-    pdf.set_font("Helvetica", size=12)
-    pdf.cell(80, 8, "Joueur", border=1)
-    pdf.cell(40, 8, "Score", border=1)
-    pdf.cell(60, 8, "Date", border=1, ln=True)
 
     for name, score, started_at in scores:
         pdf.cell(80, 8, name, border=1)
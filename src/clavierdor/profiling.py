@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import functools
+import json
+import math
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar, cast
+
+DEFAULT_WINDOW = 1000
+N_PLUS_ONE_THRESHOLD = 3
+MAX_FLAG_EXAMPLES = 20
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class CallRecord:
+    name: str
+    queries: int = 0
+    sql_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+    lazy_loads: list[str] = field(default_factory=list)
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[str]:
+        flags = [f"chargement paresseux : {load}" for load in self.lazy_loads]
+        flags.extend(
+            f"{count} exécutions de : {statement[:120]}"
+            for statement, count in self.statements.items()
+            if count >= threshold
+        )
+        return flags
+
+
+class MethodStats:
+    def __init__(self, window: int) -> None:
+        self.calls = 0
+        self.flagged_calls = 0
+        self.queries: deque[int] = deque(maxlen=window)
+        self.sql_seconds: deque[float] = deque(maxlen=window)
+        self.wall_seconds: deque[float] = deque(maxlen=window)
+        self.last: CallRecord | None = None
+
+    def add(self, record: CallRecord) -> None:
+        self.calls += 1
+        if record.n_plus_one():
+            self.flagged_calls += 1
+        self.queries.append(record.queries)
+        self.sql_seconds.append(record.sql_seconds)
+        self.wall_seconds.append(record.wall_seconds)
+        self.last = record
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "queries_mean": sum(self.queries) / len(self.queries) if self.queries else 0.0,
+            "queries_max": max(self.queries, default=0),
+            "queries_histogram": dict(sorted(Counter(self.queries).items())),
+            "sql_ms_p50": _percentile(self.sql_seconds, 50) * 1000,
+            "sql_ms_p95": _percentile(self.sql_seconds, 95) * 1000,
+            "wall_ms_p50": _percentile(self.wall_seconds, 50) * 1000,
+            "wall_ms_p95": _percentile(self.wall_seconds, 95) * 1000,
+            "wall_ms_p99": _percentile(self.wall_seconds, 99) * 1000,
+            "n_plus_one_calls": self.flagged_calls,
+        }
+
+
+def _percentile(samples: deque[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class QueryProfiler:
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._methods: dict[str, MethodStats] = {}
+        self._flags: deque[str] = deque(maxlen=MAX_FLAG_EXAMPLES)
+        self._unscoped_queries = 0
+        self._current: ContextVar[CallRecord | None] = ContextVar(
+            "clavierdor_profiler_call", default=None
+        )
+        self._started: ContextVar[float] = ContextVar("clavierdor_profiler_started", default=0.0)
+
+    @contextmanager
+    def scope(self, name: str) -> Iterator[CallRecord]:
+        if self._current.get() is not None:
+            yield self._current.get()
+            return
+        record = CallRecord(name)
+        token = self._current.set(record)
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - started
+            self._current.reset(token)
+            self._record(record)
+
+    def before_cursor_execute(self, *args: Any) -> None:
+        self._started.set(time.perf_counter())
+
+    def after_cursor_execute(self, conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        elapsed = time.perf_counter() - self._started.get()
+        record = self._current.get()
+        if record is None:
+            with self._lock:
+                self._unscoped_queries += 1
+            return
+        record.queries += 1
+        record.sql_seconds += elapsed
+        record.statements[statement] += 1
+
+    def lazy_load(self, description: str) -> None:
+        record = self._current.get()
+        if record is not None:
+            record.lazy_loads.append(description)
+
+    def stats(self, name: str) -> MethodStats | None:
+        with self._lock:
+            return self._methods.get(name)
+
+    def last_call(self, name: str) -> CallRecord | None:
+        stats = self.stats(name)
+        return stats.last if stats else None
+
+    def check_budgets(self, budgets: dict[str, int]) -> list[str]:
+        failures = []
+        for name, budget in budgets.items():
+            stats = self.stats(name)
+            if stats is not None and max(stats.queries, default=0) > budget:
+                failures.append(
+                    f"{name} : {max(stats.queries)} requêtes pour un budget de {budget}"
+                )
+        return failures
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "methods": {
+                    name: stats.summary() for name, stats in sorted(self._methods.items())
+                },
+                "unscoped_queries": self._unscoped_queries,
+                "n_plus_one": list(self._flags),
+            }
+
+    def format_report(self) -> str:
+        return json.dumps(self.report(), indent=2, ensure_ascii=False)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+            self._flags.clear()
+            self._unscoped_queries = 0
+
+    def _record(self, record: CallRecord) -> None:
+        with self._lock:
+            stats = self._methods.setdefault(record.name, MethodStats(self.window))
+            stats.add(record)
+            for flag in record.n_plus_one():
+                self._flags.append(f"{record.name} : {flag}")
+
+
+_active: QueryProfiler | None = None
+
+
+def active_profiler() -> QueryProfiler | None:
+    return _active
+
+
+def set_active_profiler(profiler: QueryProfiler | None) -> None:
+    global _active
+    _active = profiler
+
+
+def profiled(method: F) -> F:
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profiler = _active
+        if profiler is None:
+            return method(*args, **kwargs)
+        with profiler.scope(name):
+            return method(*args, **kwargs)
+
+    return cast(F, wrapper)
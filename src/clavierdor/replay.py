@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, astuple, dataclass, field, replace
+from itertools import groupby
+from pathlib import Path
+from typing import IO, Any
+
+from sqlalchemy import Connection, Engine, Select, func, select
+
+from .archive import archive_dir, iter_archived_range
+from .grading import ordered_map
+from .models import AnswerLog, GameSession
+from .orm import (
+    ENGINE_PROFILES,
+    EngineProfile,
+    configure_database,
+    db_path,
+    engine_profile,
+    get_engine,
+    init_db,
+)
+from .scoring import STAGE_MAX, Progress, apply_answer, apply_back_joker
+
+REPLAY_RANGE_SIZE = 10_000
+REPLAY_FETCH_SIZE = 5000
+MAX_REPORTED_DRIFTS = 50
+CHECKPOINT_VERSION = 1
+REPLAYED_COLUMNS = ("stage", "score", "streak", "completed", "correct_answers", "total_answers")
+
+
+@dataclass
+class SessionDrift:
+    session_id: int
+    archived: bool
+    stored: dict[str, Any]
+    replayed: dict[str, Any]
+
+    @property
+    def columns(self) -> list[str]:
+        return [name for name in REPLAYED_COLUMNS if self.stored[name] != self.replayed[name]]
+
+
+@dataclass
+class RangeResult:
+    first_session_id: int
+    last_session_id: int
+    sessions: int = 0
+    archived: int = 0
+    answers: int = 0
+    drifts: list[SessionDrift] = field(default_factory=list)
+
+
+@dataclass
+class ReplayCheckpoint:
+    next_session_id: int
+    last_session_id: int
+    sessions: int = 0
+    archived: int = 0
+    answers: int = 0
+    drifted: int = 0
+
+    @classmethod
+    def load(cls, path: Path) -> ReplayCheckpoint | None:
+        if not path.exists():
+            return None
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        if raw.pop("version", None) != CHECKPOINT_VERSION:
+            raise ValueError(f"Point de reprise invalide : {path}")
+        return cls(**raw)
+
+    def save(self, path: Path) -> None:
+        temporary = path.with_suffix(".tmp")
+        payload = {"version": CHECKPOINT_VERSION, **asdict(self)}
+        temporary.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+@dataclass
+class ReplayReport:
+    sessions: int = 0
+    archived: int = 0
+    answers: int = 0
+    drifted: int = 0
+    resumed_from: int | None = None
+    drifts: list[SessionDrift] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def answers_per_second(self) -> float:
+        return self.answers / self.seconds if self.seconds else 0.0
+
+
+def replay_session(
+    answers: Iterable[bool], back_joker_used: bool = False, stage_max: int = STAGE_MAX
+) -> list[Progress]:
+    base = Progress()
+    with_joker: list[Progress] = []
+    for is_correct in answers:
+        apply_answer(base, is_correct, stage_max)
+        for progress in with_joker:
+            apply_answer(progress, is_correct, stage_max)
+        if back_joker_used and not is_correct:
+            joker = replace(base)
+            apply_back_joker(joker)
+            with_joker.append(joker)
+            with_joker = list({astuple(progress): progress for progress in with_joker}.values())
+    return [base, *with_joker]
+
+
+def check_session(
+    session_id: int,
+    stored: dict[str, Any],
+    answers: list[bool],
+    back_joker_used: bool,
+    archived: bool = False,
+    stage_max: int = STAGE_MAX,
+) -> SessionDrift | None:
+    best = None
+    best_mismatches = len(REPLAYED_COLUMNS) + 1
+    for progress in replay_session(answers, back_joker_used, stage_max):
+        replayed = {name: getattr(progress, name) for name in REPLAYED_COLUMNS}
+        mismatches = sum(stored[name] != replayed[name] for name in REPLAYED_COLUMNS)
+        if not mismatches:
+            return None
+        if mismatches < best_mismatches:
+            best, best_mismatches = replayed, mismatches
+    return SessionDrift(session_id, archived, stored, best)
+
+
+def range_sessions_query(first_session_id: int, last_session_id: int) -> Select:
+    return (
+        select(
+            GameSession.id,
+            GameSession.back_joker_used,
+            GameSession.archived_at,
+            *(getattr(GameSession, name) for name in REPLAYED_COLUMNS),
+        )
+        .where(GameSession.id.between(first_session_id, last_session_id))
+        .order_by(GameSession.id)
+    )
+
+
+def range_answers_query(first_session_id: int, last_session_id: int) -> Select:
+    return (
+        select(AnswerLog.session_id, AnswerLog.is_correct)
+        .where(AnswerLog.session_id.between(first_session_id, last_session_id))
+        .order_by(AnswerLog.session_id, AnswerLog.answered_at, AnswerLog.id)
+    )
+
+
+def _archived_answers(
+    directory: Path, session_ids: list[int]
+) -> dict[int, list[tuple[Any, int, bool]]]:
+    wanted = set(session_ids)
+    answers: dict[int, list[tuple[Any, int, bool]]] = defaultdict(list)
+    for answer in iter_archived_range(session_ids[0], session_ids[-1], directory):
+        if answer.session_id in wanted:
+            answers[answer.session_id].append((answer.answered_at, answer.id, answer.is_correct))
+    for entries in answers.values():
+        entries.sort()
+    return answers
+
+
+def replay_range(
+    connection: Connection,
+    first_session_id: int,
+    last_session_id: int,
+    archive_directory: Path | None = None,
+    stage_max: int = STAGE_MAX,
+) -> RangeResult:
+    result = RangeResult(first_session_id, last_session_id)
+    sessions = connection.execute(range_sessions_query(first_session_id, last_session_id)).all()
+    if not sessions:
+        return result
+    archived_ids = [row.id for row in sessions if row.archived_at is not None]
+    archived: dict[int, list[tuple[Any, int, bool]]] = {}
+    if archived_ids:
+        archived = _archived_answers(archive_directory or archive_dir(), archived_ids)
+    rows = connection.execution_options(yield_per=REPLAY_FETCH_SIZE).execute(
+        range_answers_query(first_session_id, last_session_id)
+    )
+    groups = groupby(rows, key=lambda row: row.session_id)
+    pending = next(groups, None)
+    for row in sessions:
+        while pending is not None and pending[0] < row.id:
+            pending = next(groups, None)
+        if row.archived_at is not None:
+            answers = [is_correct for _, _, is_correct in archived.get(row.id, [])]
+            result.archived += 1
+        elif pending is not None and pending[0] == row.id:
+            answers = [bool(answer.is_correct) for answer in pending[1]]
+            pending = next(groups, None)
+        else:
+            answers = []
+        stored = {name: getattr(row, name) for name in REPLAYED_COLUMNS}
+        stored["completed"] = bool(stored["completed"])
+        drift = check_session(
+            row.id,
+            stored,
+            answers,
+            bool(row.back_joker_used),
+            row.archived_at is not None,
+            stage_max,
+        )
+        if drift is not None:
+            result.drifts.append(drift)
+        result.sessions += 1
+        result.answers += len(answers)
+    return result
+
+
+_worker_archive_directory: Path | None = None
+_worker_stage_max = STAGE_MAX
+
+
+def _init_worker(
+    path: Path, profile: EngineProfile, archive_directory: Path | None, stage_max: int
+) -> None:
+    global _worker_archive_directory, _worker_stage_max
+    configure_database(path, profile)
+    _worker_archive_directory = archive_directory
+    _worker_stage_max = stage_max
+
+
+def _replay_in_worker(bounds: tuple[int, int]) -> RangeResult:
+    with get_engine().connect() as connection:
+        return replay_range(connection, *bounds, _worker_archive_directory, _worker_stage_max)
+
+
+def _replay_locally(
+    engine: Engine, bounds: tuple[int, int], archive_directory: Path | None, stage_max: int
+) -> RangeResult:
+    with engine.connect() as connection:
+        return replay_range(connection, *bounds, archive_directory, stage_max)
+
+
+def _ranges(first: int, last: int, size: int) -> Iterator[tuple[int, int]]:
+    for start in range(first, last + 1, size):
+        yield start, min(start + size - 1, last)
+
+
+def replay_sessions(
+    workers: int | None = None,
+    range_size: int = REPLAY_RANGE_SIZE,
+    checkpoint: Path | None = None,
+    archive_directory: Path | None = None,
+    on_drift: Callable[[SessionDrift], None] | None = None,
+    stage_max: int = STAGE_MAX,
+) -> ReplayReport:
+    if range_size < 1:
+        raise ValueError("La taille de tranche doit être positive")
+    started = time.perf_counter()
+    report = ReplayReport()
+    engine = get_engine()
+    state = ReplayCheckpoint.load(checkpoint) if checkpoint is not None else None
+    if state is None:
+        with engine.connect() as connection:
+            bounds = connection.execute(
+                select(func.min(GameSession.id), func.max(GameSession.id))
+            ).one()
+        state = ReplayCheckpoint(bounds[0] or 1, bounds[1] or 0)
+    else:
+        report.resumed_from = state.next_session_id
+    report.sessions = state.sessions
+    report.archived = state.archived
+    report.answers = state.answers
+    report.drifted = state.drifted
+    ranges = _ranges(state.next_session_id, state.last_session_id, range_size)
+    workers = workers or os.cpu_count() or 1
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker,
+            initargs=(db_path(), engine_profile(), archive_directory, stage_max),
+        )
+        results = ordered_map(executor, _replay_in_worker, ranges, workers * 2)
+    else:
+        results = (
+            _replay_locally(engine, bounds, archive_directory, stage_max) for bounds in ranges
+        )
+    try:
+        for result in results:
+            for drift in result.drifts:
+                if on_drift is not None:
+                    on_drift(drift)
+                if len(report.drifts) < MAX_REPORTED_DRIFTS:
+                    report.drifts.append(drift)
+            report.sessions += result.sessions
+            report.archived += result.archived
+            report.answers += result.answers
+            report.drifted += len(result.drifts)
+            if checkpoint is not None:
+                state.next_session_id = result.last_session_id + 1
+                state.sessions = report.sessions
+                state.archived = report.archived
+                state.answers = report.answers
+                state.drifted = report.drifted
+                state.save(checkpoint)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _write_drift(handle: IO[str], drift: SessionDrift) -> None:
+    record = {
+        "session_id": drift.session_id,
+        "archived": drift.archived,
+        "columns": drift.columns,
+        "stored": drift.stored,
+        "replayed": drift.replayed,
+    }
+    handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Rejoue les réponses enregistrées et signale les parties incohérentes"
+    )
+    parser.add_argument("--db", help="Chemin de la base SQLite")
+    parser.add_argument(
+        "--engine-profile", choices=list(ENGINE_PROFILES), help="Réglages SQLite à appliquer"
+    )
+    parser.add_argument("--workers", type=int, help="Processus de rejeu (1 = sans pool)")
+    parser.add_argument(
+        "--range-size", type=int, default=REPLAY_RANGE_SIZE, help="Parties par tranche"
+    )
+    parser.add_argument("--checkpoint", type=Path, help="Fichier de reprise (JSON)")
+    parser.add_argument("--archive-dir", type=Path, help="Dossier des archives")
+    parser.add_argument("--output", type=Path, help="Fichier JSONL des écarts (écran sinon)")
+    args = parser.parse_args(argv)
+    if args.db or args.engine_profile:
+        configure_database(args.db, args.engine_profile)
+    init_db()
+    handle = args.output.open("a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        report = replay_sessions(
+            args.workers,
+            args.range_size,
+            args.checkpoint,
+            args.archive_dir,
+            lambda drift: _write_drift(handle, drift),
+        )
+    finally:
+        if args.output:
+            handle.close()
+    resumed = f", repris à la partie {report.resumed_from}" if report.resumed_from else ""
+    summary = sys.stdout if args.output else sys.stderr
+    print(
+        f"{report.sessions} parties rejouées ({report.archived} archivées), "
+        f"{report.answers} réponses, {report.drifted} écarts{resumed} "
+        f"({report.answers_per_second:.0f} réponses/s)",
+        file=summary,
+    )
+
+
+if __name__ == "__main__":
+    main()
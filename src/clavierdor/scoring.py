@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Protocol
+
+STAGE_MAX = 4
+CORRECT_POINTS = 10
+STREAK_BONUS = 5
+STREAK_BONUS_FROM = 3
+BACK_JOKER_POINTS = 5
+
+
+class ScoredProgress(Protocol):
+    stage: int
+    score: int
+    streak: int
+    completed: bool
+    correct_answers: int
+    total_answers: int
+
+
+@dataclass
+class Progress:
+    stage: int = 1
+    score: int = 0
+    streak: int = 0
+    completed: bool = False
+    correct_answers: int = 0
+    total_answers: int = 0
+
+
+def apply_answer(progress: ScoredProgress, is_correct: bool, stage_max: int = STAGE_MAX) -> None:
+    if is_correct:
+        progress.streak += 1
+        score_gain = CORRECT_POINTS
+        if progress.streak >= STREAK_BONUS_FROM:
+            score_gain += STREAK_BONUS
+        progress.score += score_gain
+        if progress.stage < stage_max:
+            progress.stage += 1
+        else:
+            progress.completed = True
+    else:
+        progress.streak = 0
+    progress.total_answers += 1
+    if is_correct:
+        progress.correct_answers += 1
+
+
+def apply_back_joker(progress: ScoredProgress) -> None:
+    progress.score += BACK_JOKER_POINTS
+    progress.streak = 1
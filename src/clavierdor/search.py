@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import (
+    Connection,
+    Select,
+    bindparam,
+    column,
+    func,
+    literal_column,
+    select,
+    table,
+    tuple_,
+)
+
+from .models import Question
+
+SEARCH_TABLE = "question_search"
+SEARCH_COLUMNS = ("prompt", "choice_a", "choice_b", "choice_c", "choice_d", "hint")
+SEARCH_WEIGHTS = (3.0, 1.0, 1.0, 1.0, 1.0, 0.5)
+DUPLICATE_COLUMNS = ("prompt", "choice_a", "choice_b", "choice_c", "choice_d")
+SNIPPET_TOKENS = 12
+NEAR_DUPLICATE_TERMS = 8
+NEAR_DUPLICATE_CANDIDATES = 5
+NEAR_DUPLICATE_THRESHOLD = 0.8
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+
+question_search = table(
+    SEARCH_TABLE, column("rowid"), column("rank"), *(column(name) for name in SEARCH_COLUMNS)
+)
+question_search_vocab = table(f"{SEARCH_TABLE}_vocab", column("term"), column("doc"))
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    rank: float
+    question_id: int
+
+    def to_token(self) -> str:
+        return f"{self.rank!r}|{self.question_id}"
+
+    @classmethod
+    def from_token(cls, token: str) -> SearchCursor:
+        try:
+            rank, question_id = token.split("|")
+            return cls(float(rank), int(question_id))
+        except ValueError as exc:
+            raise ValueError("Curseur de recherche invalide") from exc
+
+
+@dataclass(frozen=True)
+class QuestionMatch:
+    question_id: int
+    stage: int
+    prompt: str
+    snippet: str
+    rank: float
+
+
+@dataclass
+class QuestionSearchPage:
+    matches: list[QuestionMatch]
+    next_cursor: SearchCursor | None
+
+
+@dataclass(frozen=True)
+class NearDuplicate:
+    question_id: int
+    similar_id: int
+    similarity: float
+
+
+def search_terms(text: str) -> list[str]:
+    folded = text.casefold()
+    if not folded.isascii():
+        folded = COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", folded))
+    return TOKEN_PATTERN.findall(folded)
+
+
+def match_expression(text: str, prefix: bool = True) -> str:
+    terms = [f'"{term}"' for term in dict.fromkeys(search_terms(text))]
+    if not terms:
+        raise ValueError("Recherche vide")
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _matching(expression: Any) -> Select:
+    return (
+        select(Question.id)
+        .select_from(question_search)
+        .join(Question, Question.id == question_search.c.rowid)
+        .where(literal_column(SEARCH_TABLE).op("MATCH")(expression))
+    )
+
+
+def near_duplicate_candidates_query() -> Select:
+    return (
+        _matching(bindparam("expression"))
+        .add_columns(*(getattr(Question, name) for name in DUPLICATE_COLUMNS))
+        .where(Question.id < bindparam("question_id"))
+        .order_by(question_search.c.rank)
+        .limit(NEAR_DUPLICATE_CANDIDATES)
+    )
+
+
+def search_query(expression: str, limit: int, after: SearchCursor | None = None) -> Select:
+    rank = question_search.c.rank
+    statement = (
+        _matching(expression)
+        .add_columns(
+            Question.stage,
+            Question.prompt,
+            func.snippet(
+                literal_column(SEARCH_TABLE), -1, "[", "]", "…", SNIPPET_TOKENS
+            ),
+            rank,
+        )
+        .order_by(rank, Question.id)
+        .limit(limit)
+    )
+    if after is not None:
+        statement = statement.where(
+            tuple_(rank, Question.id) > tuple_(after.rank, after.question_id)
+        )
+    return statement
+
+
+def duplicate_terms(values: Iterable[str]) -> set[str]:
+    return set(chain.from_iterable(search_terms(value) for value in values))
+
+
+def _similarity(left: set[str], right: set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class NearDuplicateDetector:
+    def __init__(self, connection: Connection) -> None:
+        vocabulary = select(question_search_vocab.c.term, question_search_vocab.c.doc)
+        self._frequencies: dict[str, int] = dict(connection.execute(vocabulary).all())
+        self._candidates = near_duplicate_candidates_query()
+
+    def check(
+        self, connection: Connection, questions: list[tuple[int, dict[str, Any]]]
+    ) -> list[NearDuplicate]:
+        found = []
+        for question_id, item in questions:
+            terms = duplicate_terms(item[name] for name in DUPLICATE_COLUMNS)
+            for term in terms:
+                self._frequencies[term] = self._frequencies.get(term, 0) + 1
+            if not terms:
+                continue
+            prefix = len(terms) - math.ceil(NEAR_DUPLICATE_THRESHOLD * len(terms)) + 1
+            rarest = sorted(terms, key=lambda term: (self._frequencies[term], term))
+            rarest = rarest[: min(prefix, NEAR_DUPLICATE_TERMS)]
+            candidates = connection.execute(
+                self._candidates,
+                {
+                    "expression": " OR ".join(f'"{term}"' for term in rarest),
+                    "question_id": question_id,
+                },
+            )
+            for similar_id, *values in candidates:
+                similarity = _similarity(terms, duplicate_terms(values))
+                if similarity >= NEAR_DUPLICATE_THRESHOLD:
+                    found.append(NearDuplicate(question_id, similar_id, similarity))
+        return found
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from random import Random
+
+from .models import Question
+from .snapshot import BankQuestion
+
+DIFFICULTY_PRIOR = 0.5
+EASIEST_TARGET = 0.25
+HARDEST_TARGET = 0.7
+BANDWIDTH = 0.2
+MIN_WEIGHT = 0.05
+WEIGHT_TOLERANCE = 0.05
+MAX_DRAWS = 32
+
+
+class AliasTable:
+    __slots__ = ("alias", "probability")
+
+    def __init__(self, weights: Sequence[float]) -> None:
+        count = len(weights)
+        if not count:
+            raise ValueError("Table d'alias vide")
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("Les poids doivent être positifs")
+        scaled = [weight * count / total for weight in weights]
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+    def __len__(self) -> int:
+        return len(self.alias)
+
+    def sample(self, rng: Random) -> int:
+        index = rng.randrange(len(self.alias))
+        return index if rng.random() < self.probability[index] else self.alias[index]
+
+
+def target_difficulty(stage: int, stage_max: int) -> float:
+    if stage_max <= 1:
+        return EASIEST_TARGET
+    position = (min(max(stage, 1), stage_max) - 1) / (stage_max - 1)
+    return EASIEST_TARGET + (HARDEST_TARGET - EASIEST_TARGET) * position
+
+
+def question_weight(difficulty: float, stage: int, stage_max: int) -> float:
+    distance = (difficulty - target_difficulty(stage, stage_max)) / BANDWIDTH
+    return MIN_WEIGHT + math.exp(-distance * distance)
+
+
+@dataclass
+class StageDeck:
+    questions: list[Question | BankQuestion]
+    weights: list[float]
+    table: AliasTable
+
+    def same_weights(
+        self, questions: list[Question | BankQuestion], weights: list[float]
+    ) -> bool:
+        if len(questions) != len(self.questions) or any(
+            new is not old for new, old in zip(questions, self.questions, strict=True)
+        ):
+            return False
+        return all(
+            abs(new - old) <= WEIGHT_TOLERANCE * old
+            for new, old in zip(weights, self.weights, strict=True)
+        )
+
+
+class QuestionSelector:
+    def __init__(self, stage_max: int) -> None:
+        self.stage_max = stage_max
+        self._decks: dict[int, StageDeck] = {}
+
+    def rebuild(
+        self, by_stage: dict[int, list[Question | BankQuestion]], difficulties: dict[int, float]
+    ) -> list[int]:
+        rebuilt = []
+        for stage, questions in by_stage.items():
+            weights = [
+                question_weight(
+                    difficulties.get(question.id, DIFFICULTY_PRIOR), stage, self.stage_max
+                )
+                for question in questions
+            ]
+            current = self._decks.get(stage)
+            if current is not None and current.same_weights(questions, weights):
+                continue
+            self._decks[stage] = StageDeck(questions, weights, AliasTable(weights))
+            rebuilt.append(stage)
+        for stage in set(self._decks) - set(by_stage):
+            del self._decks[stage]
+        return rebuilt
+
+    def update(
+        self,
+        by_stage: dict[int, list[Question | BankQuestion]],
+        difficulties: dict[int, float],
+        changed: Collection[int],
+    ) -> None:
+        for stage, questions in by_stage.items():
+            if not questions:
+                self._decks.pop(stage, None)
+                continue
+            current = self._decks.get(stage)
+            known = {}
+            if current is not None:
+                known = {
+                    question.id: weight
+                    for question, weight in zip(current.questions, current.weights, strict=True)
+                    if question.id not in changed
+                }
+            weights = [
+                known[question.id]
+                if question.id in known
+                else question_weight(
+                    difficulties.get(question.id, DIFFICULTY_PRIOR), stage, self.stage_max
+                )
+                for question in questions
+            ]
+            self._decks[stage] = StageDeck(questions, weights, AliasTable(weights))
+
+    def choose(
+        self, stage: int, seed: int, offset: int = 0, seen: Collection[int] = ()
+    ) -> Question | BankQuestion | None:
+        deck = self._decks.get(stage)
+        if deck is None:
+            return None
+        rng = Random(seed * (self.stage_max + 1) + stage)
+        drawn: list[int] = []
+        fresh: list[int] = []
+        for _ in range(MAX_DRAWS + offset):
+            index = deck.table.sample(rng)
+            if index in drawn:
+                continue
+            drawn.append(index)
+            if deck.questions[index].id not in seen:
+                fresh.append(index)
+                if len(fresh) > offset:
+                    return deck.questions[fresh[offset]]
+            if len(drawn) == len(deck.questions):
+                break
+        return deck.questions[drawn[offset % len(drawn)]]
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, replace
+from datetime import datetime
+from enum import Enum
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from .core import NotFoundError
+from .models import LeaderboardWindow, RoleType
+from .orm import ENGINE_PROFILES, configure_database, enable_query_profiling
+from .profiling import active_profiler
+from .search import SearchCursor
+from .services import GameService, LeaderboardCursor, SessionState
+from .session_cache import DEFAULT_CAPACITY, SessionStateCache
+from .snapshot import default_snapshot_path
+from .write_behind import Durability, WriteBehindLog
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 16
+LOCK_STRIPES = 256
+
+GAME_ROUTE = re.compile(r"^/games/(?P<session_id>\d+)/(?P<action>[a-z/]+)$")
+STATE_ROUTE = re.compile(r"^/games/(?P<session_id>\d+)$")
+
+
+class BadRequest(Exception):
+    pass
+
+
+class SessionLocks:
+    def __init__(self, stripes: int = LOCK_STRIPES) -> None:
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    @contextmanager
+    def hold(self, key: object) -> Iterator[None]:
+        lock = self._locks[hash(key) % len(self._locks)]
+        with lock:
+            yield
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+
+def _state_payload(state: SessionState | None) -> dict[str, Any] | None:
+    if state is None:
+        return None
+    payload = asdict(replace(state, current_question=None))
+    question = state.current_question
+    if question is not None:
+        payload["current_question"] = {
+            "id": question.id,
+            "prompt": question.prompt,
+            "choices": dict(question.choices),
+            "stage": question.stage,
+        }
+    return payload
+
+
+class GameRequestHandler(BaseHTTPRequestHandler):
+    server: GameServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        state_match = STATE_ROUTE.match(url.path)
+        if url.path == "/scores":
+            self._respond(self._list_scores)
+        elif url.path == "/profiling":
+            self._respond(self._profiling)
+        elif url.path == "/cache":
+            self._respond(lambda body: asdict(self.server.service.cache_stats()))
+        elif url.path == "/leaderboard":
+            query = parse_qs(url.query)
+            self._respond(lambda body: self._leaderboard(query))
+        elif url.path == "/questions/search":
+            query = parse_qs(url.query)
+            self._respond(lambda body: self._search_questions(query))
+        elif state_match:
+            session_id = int(state_match["session_id"])
+            self._respond(lambda body: _state_payload(self.server.service.get_state(session_id)))
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": "Route inconnue"})
+
+    def do_POST(self) -> None:
+        if self.path == "/games":
+            self._respond(self._start_new_game)
+            return
+        if self.path == "/games/resume":
+            self._respond(self._resume_last_game)
+            return
+        match = GAME_ROUTE.match(self.path)
+        handler = self._game_actions().get(match["action"]) if match else None
+        if match is None or handler is None:
+            self._send(HTTPStatus.NOT_FOUND, {"error": "Route inconnue"})
+            return
+        session_id = int(match["session_id"])
+        self._respond(lambda body: handler(session_id, body))
+
+    def _game_actions(self) -> dict[str, Callable[[int, dict[str, Any]], Any]]:
+        return {
+            "answer": self._submit_answer,
+            "jokers/front": self._use_front_joker,
+            "jokers/back": self._use_back_joker,
+            "jokers/mobile": self._use_mobile_joker,
+        }
+
+    def _start_new_game(self, body: dict[str, Any]) -> Any:
+        name = self._require(body, "name", str).strip()
+        try:
+            role = RoleType(self._require(body, "role", str))
+        except ValueError as exc:
+            raise BadRequest("Rôle inconnu") from exc
+        if not name:
+            raise BadRequest("Nom manquant")
+        with self.server.locks.hold(("player", name)):
+            return _state_payload(self.server.service.start_new_game(name, role))
+
+    def _resume_last_game(self, body: dict[str, Any]) -> Any:
+        name = self._require(body, "name", str).strip()
+        with self.server.locks.hold(("player", name)):
+            return _state_payload(self.server.service.resume_last_game(name))
+
+    def _submit_answer(self, session_id: int, body: dict[str, Any]) -> Any:
+        question_id = self._require(body, "question_id", int)
+        selected = self._require(body, "selected", str)
+        if len(selected) != 1:
+            raise BadRequest("Champ invalide : selected")
+        with self.server.locks.hold(("session", session_id)):
+            return _state_payload(
+                self.server.service.submit_answer(session_id, question_id, selected)
+            )
+
+    def _use_front_joker(self, session_id: int, body: dict[str, Any]) -> Any:
+        current_question_id = None
+        if body.get("current_question_id") is not None:
+            current_question_id = self._require(body, "current_question_id", int)
+        with self.server.locks.hold(("session", session_id)):
+            return _state_payload(
+                self.server.service.use_front_joker(session_id, current_question_id)
+            )
+
+    def _use_back_joker(self, session_id: int, body: dict[str, Any]) -> Any:
+        with self.server.locks.hold(("session", session_id)):
+            return _state_payload(self.server.service.use_back_joker(session_id))
+
+    def _use_mobile_joker(self, session_id: int, body: dict[str, Any]) -> Any:
+        with self.server.locks.hold(("session", session_id)):
+            return {"hint": self.server.service.use_mobile_joker(session_id)}
+
+    def _list_scores(self, body: dict[str, Any]) -> Any:
+        return [
+            {"name": name, "score": score, "started_at": started_at}
+            for name, score, started_at in self.server.service.list_scores()
+        ]
+
+    def _leaderboard(self, query: dict[str, list[str]]) -> Any:
+        try:
+            limit = int(query.get("limit", ["10"])[0])
+        except ValueError as exc:
+            raise BadRequest("Limite invalide") from exc
+        if not 1 <= limit <= 100:
+            raise BadRequest("Limite invalide")
+        after = None
+        if "after" in query:
+            try:
+                after = LeaderboardCursor.from_token(query["after"][0])
+            except ValueError as exc:
+                raise BadRequest(str(exc)) from exc
+        window = None
+        if "window" in query:
+            try:
+                window = LeaderboardWindow(query["window"][0])
+            except ValueError as exc:
+                raise BadRequest("Période de classement invalide") from exc
+        bucket = query.get("bucket", [None])[0]
+        page = self.server.service.leaderboard(limit, after, window, bucket)
+        return {
+            "entries": [asdict(entry) for entry in page.entries],
+            "next": page.next_cursor.to_token() if page.next_cursor else None,
+        }
+
+    def _search_questions(self, query: dict[str, list[str]]) -> Any:
+        text = query.get("q", [""])[0]
+        try:
+            limit = int(query.get("limit", ["20"])[0])
+        except ValueError as exc:
+            raise BadRequest("Limite invalide") from exc
+        if not 1 <= limit <= 100:
+            raise BadRequest("Limite invalide")
+        after = None
+        if "after" in query:
+            try:
+                after = SearchCursor.from_token(query["after"][0])
+            except ValueError as exc:
+                raise BadRequest(str(exc)) from exc
+        try:
+            page = self.server.service.search_questions(text, limit, after)
+        except ValueError as exc:
+            raise BadRequest(str(exc)) from exc
+        return {
+            "matches": [asdict(match) for match in page.matches],
+            "next": page.next_cursor.to_token() if page.next_cursor else None,
+        }
+
+    def _profiling(self, body: dict[str, Any]) -> Any:
+        profiler = active_profiler()
+        if profiler is None:
+            raise BadRequest("Profilage désactivé (option --profile)")
+        return profiler.report()
+
+    def _require(self, body: dict[str, Any], key: str, kind: type) -> Any:
+        if key not in body:
+            raise BadRequest(f"Champ manquant : {key}")
+        value = body[key]
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            raise BadRequest(f"Champ invalide : {key}")
+        return value
+
+    def _read_body(self) -> dict[str, Any]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError as exc:
+            raise BadRequest("En-tête Content-Length invalide") from exc
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as exc:
+            raise BadRequest("JSON invalide") from exc
+        if not isinstance(body, dict):
+            raise BadRequest("Objet JSON attendu")
+        return body
+
+    def _respond(self, action: Callable[[dict[str, Any]], Any]) -> None:
+        try:
+            payload = action(self._read_body())
+        except BadRequest as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+        except NotFoundError as exc:
+            self._send(HTTPStatus.NOT_FOUND, {"error": str(exc)})
+        except Exception:  # noqa: BLE001
+            self.server.handle_error(self.request, self.client_address)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Erreur interne"})
+        else:
+            self._send(HTTPStatus.OK, payload)
+
+    def _send(self, status: HTTPStatus, payload: Any) -> None:
+        data = json.dumps(payload, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class GameServer(HTTPServer):
+    def __init__(
+        self,
+        address: tuple[str, int],
+        service: GameService | None = None,
+        workers: int = DEFAULT_WORKERS,
+        verbose: bool = False,
+    ) -> None:
+        super().__init__(address, GameRequestHandler)
+        self.service = service or GameService()
+        self.locks = SessionLocks()
+        self.verbose = verbose
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clavierdor")
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # noqa: BLE001
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=True)
+        self.service.close()
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = DEFAULT_WORKERS,
+    verbose: bool = False,
+    write_behind: WriteBehindLog | None = None,
+    cache_size: int = DEFAULT_CAPACITY,
+    question_snapshot: Path | None = None,
+) -> None:
+    service = GameService(
+        write_behind=write_behind,
+        state_cache=SessionStateCache(cache_size),
+        question_snapshot=question_snapshot,
+    )
+    with GameServer((host, port), service, workers=workers, verbose=verbose) as server:
+        print(f"Serveur Clavier d'Or sur http://{host}:{server.server_port} ({workers} workers)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serveur de jeu Clavier d'Or (HTTP/JSON)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--db", help="Chemin de la base SQLite")
+    parser.add_argument(
+        "--engine-profile", choices=list(ENGINE_PROFILES), help="Réglages SQLite à appliquer"
+    )
+    parser.add_argument(
+        "--write-behind",
+        action="store_true",
+        help="Regroupe les écritures de réponses en commits groupés",
+    )
+    parser.add_argument("--group-size", type=int, default=256)
+    parser.add_argument("--group-delay-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--durability", choices=[item.value for item in Durability], default="buffered"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CAPACITY,
+        help="Nombre de parties gardées en mémoire (GET /cache)",
+    )
+    parser.add_argument(
+        "--question-snapshot",
+        nargs="?",
+        const="",
+        help="Charge les questions depuis un instantané mmap (par défaut à côté de la base)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="Compte les requêtes SQL (GET /profiling)"
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    if args.db or args.engine_profile:
+        configure_database(args.db, args.engine_profile)
+    if args.profile:
+        enable_query_profiling()
+    write_behind = None
+    if args.write_behind:
+        write_behind = WriteBehindLog(
+            args.group_size, args.group_delay_ms, Durability(args.durability)
+        )
+    question_snapshot = None
+    if args.question_snapshot is not None:
+        question_snapshot = Path(args.question_snapshot or default_snapshot_path())
+    serve(
+        args.host,
+        args.port,
+        args.workers,
+        args.verbose,
+        write_behind,
+        args.cache_size,
+        question_snapshot,
+    )
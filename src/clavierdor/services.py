@@ -1,45 +1,126 @@
 from __future__ import annotations
 
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Future
 from dataclasses import dataclass
 from datetime import datetime
-from random import shuffle
+from pathlib import Path
 
-from sqlalchemy import select
-from sqlalchemy import func
+from sqlalchemy import Row, Select, select, tuple_
 
+from .core import GameCore, SessionState, history_query
 from .data import seed_questions
-from .models import AnswerLog, GameSession, Player, Question, RoleType
+from .models import (
+    GameSession,
+    LeaderboardWindow,
+    PeriodBestScore,
+    Player,
+    PlayerBestScore,
+    RoleType,
+    leaderboard_bucket,
+    utc_now,
+)
 from .orm import get_session, init_db
+from .profiling import profiled
+from .scoring import STAGE_MAX
+from .search import (
+    QuestionMatch,
+    QuestionSearchPage,
+    SearchCursor,
+    match_expression,
+    search_query,
+)
+from .session_cache import CacheStats, SessionStateCache
+from .write_behind import WriteBehindLog
 
 
-@dataclass
-class QuestionView:
-    id: int
-    prompt: str
-    choices: dict[str, str]
-    correct_choice: str
-    hint: str
-    stage: int
+@dataclass(frozen=True)
+class LeaderboardCursor:
+    score: int
+    started_at: datetime
+    session_id: int
 
+    def to_token(self) -> str:
+        return f"{self.score}|{self.started_at.isoformat()}|{self.session_id}"
 
-@dataclass
-class SessionState:
-    session_id: int
+    @classmethod
+    def from_token(cls, token: str) -> LeaderboardCursor:
+        try:
+            score, started_at, session_id = token.split("|")
+            return cls(int(score), datetime.fromisoformat(started_at), int(session_id))
+        except ValueError as exc:
+            raise ValueError("Curseur de classement invalide") from exc
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
     player_name: str
-    role: RoleType
-    stage: int
     score: int
-    streak: int
-    correct_answers: int
-    total_answers: int
-    accuracy: float
-    current_question: QuestionView | None
-    completed: bool
-    perk_used: bool
+    started_at: datetime
+    session_id: int
+
+
+@dataclass
+class LeaderboardPage:
+    entries: list[LeaderboardEntry]
+    next_cursor: LeaderboardCursor | None
+
+
+def scores_query() -> Select:
+    return (
+        select(Player.name, GameSession.score, GameSession.started_at)
+        .join(GameSession)
+        .order_by(GameSession.score.desc())
+    )
+
+
+def leaderboard_query(
+    limit: int,
+    after: LeaderboardCursor | None = None,
+    window: LeaderboardWindow | None = None,
+    bucket: str | None = None,
+) -> Select:
+    best: type[PlayerBestScore | PeriodBestScore] = PlayerBestScore
+    if window is not None:
+        best = PeriodBestScore
+    statement = (
+        select(Player.name, best.score, best.started_at, best.session_id)
+        .join(Player, Player.id == best.player_id)
+        .order_by(best.score.desc(), best.started_at.desc(), best.session_id.desc())
+        .limit(limit)
+    )
+    if window is not None:
+        statement = statement.where(
+            PeriodBestScore.window == window, PeriodBestScore.bucket == bucket
+        )
+    if after is not None:
+        statement = statement.where(
+            tuple_(best.score, best.started_at, best.session_id)
+            < tuple_(after.score, after.started_at, after.session_id)
+        )
+    return statement
+
+
+def leaderboard_page(rows: Sequence[Row], limit: int) -> LeaderboardPage:
+    entries = [LeaderboardEntry(*row) for row in rows]
+    next_cursor = None
+    if len(entries) == limit:
+        last = entries[-1]
+        next_cursor = LeaderboardCursor(last.score, last.started_at, last.session_id)
+    return LeaderboardPage(entries=entries, next_cursor=next_cursor)
+
+
+def search_page(rows: Sequence[Row], limit: int) -> QuestionSearchPage:
+    matches = [QuestionMatch(*row) for row in rows]
+    next_cursor = None
+    if len(matches) == limit:
+        last = matches[-1]
+        next_cursor = SearchCursor(last.rank, last.question_id)
+    return QuestionSearchPage(matches=matches, next_cursor=next_cursor)
 
 
 class GameService:
-    STAGE_MAX = 4
+    STAGE_MAX = STAGE_MAX
     STAGE_LABELS = {
         1: "Qualification",
         2: "Demi-finale",
@@ -47,217 +128,141 @@ class GameService:
         4: "Clavier d'or",
     }
 
-    def __init__(self) -> None:
-        init_db()
-        seed_questions()
-        self._question_cache: list[Question] = []
-
-    def _load_questions(self) -> list[Question]:
-        with get_session() as session:
-            questions = session.scalars(select(Question)).all()
-            shuffle(questions)
-            self._question_cache = questions
-            return questions
-
-    def _get_question_for_stage(self, stage: int) -> Question | None:
-        if not self._question_cache:
-            self._load_questions()
-        for question in self._question_cache:
-            if question.stage == stage:
-                return question
-        return None
-
-    def _question_view(self, question: Question) -> QuestionView:
-        return QuestionView(
-            id=question.id,
-            prompt=question.prompt,
-            choices={
-                "A": question.choice_a,
-                "B": question.choice_b,
-                "C": question.choice_c,
-                "D": question.choice_d,
-            },
-            correct_choice=question.correct_choice,
-            hint=question.hint,
-            stage=question.stage,
-        )
+    def __init__(
+        self,
+        write_behind: WriteBehindLog | None = None,
+        state_cache: SessionStateCache | None = None,
+        question_snapshot: Path | None = None,
+    ) -> None:
+        init_db(seed_questions)
+        self._core = GameCore(write_behind, question_snapshot)
+        self._state_cache = state_cache or SessionStateCache()
 
+    @profiled
     def start_new_game(self, name: str, role: RoleType) -> SessionState:
         with get_session() as session:
-            player = session.scalar(select(Player).where(Player.name == name))
-            if player is None:
-                player = Player(name=name, role=role)
-                session.add(player)
-                session.flush()
-            else:
-                player.role = role
-            new_session = GameSession(player=player)
-            session.add(new_session)
-            session.commit()
-            return self._build_state(new_session.id)
+            state = self._core.start_game(session, name, role)
+        self._state_cache.put(state, latest=True)
+        return state
 
+    @profiled
     def resume_last_game(self, name: str) -> SessionState | None:
+        cached = self._state_cache.get_latest(name)
+        if cached is not None:
+            return cached
         with get_session() as session:
-            player = session.scalar(select(Player).where(Player.name == name))
-            if player is None:
-                return None
-            session_obj = (
-                session.query(GameSession)
-                .where(GameSession.player_id == player.id)
-                .order_by(GameSession.started_at.desc())
-                .first()
-            )
-            if session_obj is None:
-                return None
-            return self._build_state(session_obj.id)
-
-    def _build_state(self, session_id: int) -> SessionState:
+            state = self._core.resume_game(session, name)
+        if state is not None:
+            self._state_cache.put(state, latest=True)
+        return state
+
+    @profiled
+    def get_state(self, session_id: int) -> SessionState:
+        cached = self._state_cache.get(session_id)
+        if cached is not None:
+            return cached
         with get_session() as session:
-            session_obj = session.get(GameSession, session_id)
-            if session_obj is None:
-                raise ValueError("Session introuvable")
-            total_answers = session.scalar(
-                select(func.count(AnswerLog.id)).where(AnswerLog.session_id == session_id)
-            )
-            correct_answers = session.scalar(
-                select(func.count(AnswerLog.id)).where(
-                    AnswerLog.session_id == session_id, AnswerLog.is_correct.is_(True)
-                )
-            )
-            total_answers = total_answers or 0
-            correct_answers = correct_answers or 0
-            accuracy = (correct_answers / total_answers * 100) if total_answers else 0.0
-            question = None
-            if not session_obj.completed:
-                question_obj = self._get_question_for_stage(session_obj.stage)
-                if question_obj:
-                    question = self._question_view(question_obj)
-            perk_used = self._perk_used(session_obj)
-            return SessionState(
-                session_id=session_obj.id,
-                player_name=session_obj.player.name,
-                role=session_obj.player.role,
-                stage=session_obj.stage,
-                score=session_obj.score,
-                streak=session_obj.streak,
-                correct_answers=correct_answers,
-                total_answers=total_answers,
-                accuracy=accuracy,
-                current_question=question,
-                completed=session_obj.completed,
-                perk_used=perk_used,
-            )
+            state = self._core.load_state(session, session_id)
+        self._state_cache.put(state)
+        return state
+
+    def cache_stats(self) -> CacheStats:
+        return self._state_cache.stats()
 
+    @profiled
     def submit_answer(self, session_id: int, question_id: int, selected: str) -> SessionState:
+        written: Future | None
         with get_session() as session:
-            session_obj = session.get(GameSession, session_id)
-            question = session.get(Question, question_id)
-            if session_obj is None or question is None:
-                raise ValueError("Session ou question inconnue")
-            is_correct = selected == question.correct_choice
-            if is_correct:
-                session_obj.streak += 1
-                score_gain = 10
-                if session_obj.streak >= 3:
-                    score_gain += 5
-                session_obj.score += score_gain
-                if session_obj.stage < self.STAGE_MAX:
-                    session_obj.stage += 1
-                else:
-                    session_obj.completed = True
-            else:
-                session_obj.streak = 0
-            session.add(
-                AnswerLog(
-                    session=session_obj,
-                    question_id=question.id,
-                    selected=selected,
-                    is_correct=is_correct,
-                )
-            )
-            session.commit()
-            return self._build_state(session_id)
+            state, written = self._core.submit_answer(session, session_id, question_id, selected)
+        if written is not None:
+            written.result()
+        self._state_cache.put(state)
+        return state
 
+    def flush(self) -> None:
+        self._core.flush()
+
+    def close(self) -> None:
+        self._core.close()
+
+    @profiled
     def use_front_joker(self, session_id: int, current_question_id: int | None) -> SessionState:
+        self.flush()
         with get_session() as session:
-            session_obj = session.get(GameSession, session_id)
-            if session_obj is None:
-                raise ValueError("Session inconnue")
-            if session_obj.front_joker_used:
-                return self._build_state(session_id)
-            if not self._question_cache:
-                self._load_questions()
-            if current_question_id is not None:
-                self._question_cache = [
-                    question
-                    for question in self._question_cache
-                    if question.id != current_question_id
-                ]
-            session_obj.front_joker_used = True
-            session.commit()
-            return self._build_state(session_id)
+            state = self._core.use_front_joker(session, session_id, current_question_id)
+        self._state_cache.put(state)
+        return state
 
+    @profiled
     def use_back_joker(self, session_id: int) -> SessionState:
+        self.flush()
         with get_session() as session:
-            session_obj = session.get(GameSession, session_id)
-            if session_obj is None:
-                raise ValueError("Session inconnue")
-            if session_obj.back_joker_used:
-                return self._build_state(session_id)
-            last_answer = (
-                session.query(AnswerLog)
-                .where(AnswerLog.session_id == session_id)
-                .order_by(AnswerLog.answered_at.desc())
-                .first()
-            )
-            if last_answer and not last_answer.is_correct:
-                session_obj.score += 5
-                session_obj.streak = 1
-            session_obj.back_joker_used = True
-            session.commit()
-            return self._build_state(session_id)
+            state = self._core.use_back_joker(session, session_id)
+        self._state_cache.put(state)
+        return state
 
+    @profiled
     def use_mobile_joker(self, session_id: int) -> str:
+        self.flush()
         with get_session() as session:
-            session_obj = session.get(GameSession, session_id)
-            if session_obj is None:
-                raise ValueError("Session inconnue")
-            if session_obj.mobile_joker_used:
-                return "Indice déjà utilisé."
-            session_obj.mobile_joker_used = True
-            question = self._get_question_for_stage(session_obj.stage)
-            session.commit()
-            if question:
-                return question.hint or "Pas d'indice disponible."
-            return "Pas d'indice disponible."
+            hint = self._core.use_mobile_joker(session, session_id)
+        self._state_cache.update(session_id, perk_used=True)
+        return hint
 
+    @profiled
     def list_scores(self) -> list[tuple[str, int, datetime]]:
         with get_session() as session:
-            results = (
-                session.query(Player.name, GameSession.score, GameSession.started_at)
-                .join(GameSession)
-                .order_by(GameSession.score.desc())
-                .all()
-            )
+            results = session.execute(scores_query()).all()
             return [(name, score, started_at) for name, score, started_at in results]
 
+    def iter_scores(self, batch_size: int = 1000) -> Iterator[tuple[str, int, datetime]]:
+        with get_session() as session:
+            results = session.execute(scores_query().execution_options(yield_per=batch_size))
+            yield from results.tuples()
+
+    @profiled
+    def leaderboard(
+        self,
+        limit: int = 10,
+        after: LeaderboardCursor | None = None,
+        window: LeaderboardWindow | None = None,
+        bucket: str | None = None,
+    ) -> LeaderboardPage:
+        if window is not None and bucket is None:
+            bucket = leaderboard_bucket(window, utc_now())
+        with get_session() as session:
+            rows = session.execute(leaderboard_query(limit, after, window, bucket)).all()
+        return leaderboard_page(rows, limit)
+
+    def iter_leaderboard(
+        self,
+        window: LeaderboardWindow | None = None,
+        bucket: str | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[tuple[str, int, datetime]]:
+        if window is not None and bucket is None:
+            bucket = leaderboard_bucket(window, utc_now())
+        after = None
+        while True:
+            page = self.leaderboard(batch_size, after, window, bucket)
+            for entry in page.entries:
+                yield entry.player_name, entry.score, entry.started_at
+            if page.next_cursor is None:
+                return
+            after = page.next_cursor
+
+    @profiled
+    def search_questions(
+        self, text: str, limit: int = 20, after: SearchCursor | None = None
+    ) -> QuestionSearchPage:
+        with get_session() as session:
+            rows = session.execute(search_query(match_expression(text), limit, after)).all()
+        return search_page(rows, limit)
+
+    @profiled
     def list_history(self, name: str) -> list[GameSession]:
         with get_session() as session:
             player = session.scalar(select(Player).where(Player.name == name))
             if player is None:
                 return []
-            return (
-                session.query(GameSession)
-                .where(GameSession.player_id == player.id)
-                .order_by(GameSession.started_at.desc())
-                .all()
-            )
-
-    def _perk_used(self, session_obj: GameSession) -> bool:
-        return any(
-            [
-                session_obj.front_joker_used,
-                session_obj.back_joker_used,
-                session_obj.mobile_joker_used,
-            ]
-        )
+            return list(session.scalars(history_query(player.id)))
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .core import SessionState
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_IDLE_SECONDS = 15 * 60
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    capacity: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _Entry:
+    state: SessionState
+    touched: float
+
+
+class SessionStateCache:
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, idle_seconds: float = DEFAULT_IDLE_SECONDS
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("La capacité du cache doit être positive")
+        self.capacity = capacity
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._latest_by_player: dict[str, int] = {}
+        self._sessions_by_player: dict[str, set[int]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, session_id: int) -> SessionState | None:
+        with self._lock:
+            entry = self._live_entry(session_id)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return replace(entry.state)
+
+    def get_latest(self, player_name: str) -> SessionState | None:
+        with self._lock:
+            session_id = self._latest_by_player.get(player_name)
+            entry = self._live_entry(session_id) if session_id is not None else None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return replace(entry.state)
+
+    def put(self, state: SessionState, latest: bool = False) -> None:
+        with self._lock:
+            if latest:
+                self._forget_player(state.player_name)
+            if state.completed:
+                if state.session_id in self._entries:
+                    self._evict(state.session_id)
+                return
+            if latest:
+                self._latest_by_player[state.player_name] = state.session_id
+            self._entries[state.session_id] = _Entry(replace(state), time.monotonic())
+            self._sessions_by_player.setdefault(state.player_name, set()).add(state.session_id)
+            self._entries.move_to_end(state.session_id)
+            while len(self._entries) > self.capacity:
+                self._evict(next(iter(self._entries)))
+
+    def update(self, session_id: int, **changes: Any) -> None:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry.state = replace(entry.state, **changes)
+
+    def discard(self, session_id: int) -> None:
+        with self._lock:
+            if session_id in self._entries:
+                self._evict(session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._latest_by_player.clear()
+            self._sessions_by_player.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                capacity=self.capacity,
+            )
+
+    def _live_entry(self, session_id: int) -> _Entry | None:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry.touched > self.idle_seconds:
+            self._evict(session_id)
+            return None
+        entry.touched = now
+        self._entries.move_to_end(session_id)
+        return entry
+
+    def _forget_player(self, player_name: str) -> None:
+        for session_id in list(self._sessions_by_player.get(player_name, ())):
+            self._evict(session_id)
+
+    def _evict(self, session_id: int) -> None:
+        entry = self._entries.pop(session_id)
+        player_name = entry.state.player_name
+        if self._latest_by_player.get(player_name) == session_id:
+            del self._latest_by_player[player_name]
+        sessions = self._sessions_by_player.get(player_name)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._sessions_by_player[player_name]
+        self._evictions += 1
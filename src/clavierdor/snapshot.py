@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+from collections.abc import Iterable
+from pathlib import Path
+
+from sqlalchemy import select
+
+from .models import Question
+from .orm import (
+    ENGINE_PROFILES,
+    configure_database,
+    db_path,
+    get_engine,
+    init_db,
+    question_bank_version,
+)
+
+MAGIC = b"CLVQ"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sIQI")
+RECORD = struct.Struct("<Iic3x12I")
+SPANS_OFFSET = struct.calcsize("<Iic3x")
+TEXT_FIELDS = ("prompt", "choice_a", "choice_b", "choice_c", "choice_d", "hint")
+SNAPSHOT_SUFFIX = ".questions.bin"
+
+
+class BankQuestion:
+    __slots__ = ("_index", "_snapshot", "correct_choice", "id", "stage")
+
+    def __init__(
+        self, snapshot: QuestionSnapshot, index: int, question_id: int, stage: int, correct: str
+    ) -> None:
+        self._snapshot = snapshot
+        self._index = index
+        self.id = question_id
+        self.stage = stage
+        self.correct_choice = correct
+
+    @property
+    def prompt(self) -> str:
+        return self._snapshot.text(self._index, 0)
+
+    @property
+    def choice_a(self) -> str:
+        return self._snapshot.text(self._index, 1)
+
+    @property
+    def choice_b(self) -> str:
+        return self._snapshot.text(self._index, 2)
+
+    @property
+    def choice_c(self) -> str:
+        return self._snapshot.text(self._index, 3)
+
+    @property
+    def choice_d(self) -> str:
+        return self._snapshot.text(self._index, 4)
+
+    @property
+    def hint(self) -> str:
+        return self._snapshot.text(self._index, 5)
+
+
+class QuestionSnapshot:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(f"Instantané de questions tronqué : {path}")
+        magic, format_version, self.bank_version, self.count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"Instantané de questions invalide : {path}")
+        self._strings = HEADER.size + self.count * RECORD.size
+        if len(self._map) < self._strings:
+            self._map.close()
+            raise ValueError(f"Instantané de questions tronqué : {path}")
+        self._view = memoryview(self._map)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def field_bytes(self, index: int, field: int) -> memoryview:
+        base = HEADER.size + index * RECORD.size + SPANS_OFFSET + field * 8
+        offset, length = struct.unpack_from("<II", self._map, base)
+        start = self._strings + offset
+        return self._view[start : start + length]
+
+    def text(self, index: int, field: int) -> str:
+        return str(self.field_bytes(index, field), "utf-8")
+
+    def questions(self) -> list[BankQuestion]:
+        records = self._view[HEADER.size : self._strings]
+        return [
+            BankQuestion(self, index, values[0], values[1], values[2].decode("ascii"))
+            for index, values in enumerate(RECORD.iter_unpack(records))
+        ]
+
+    def close(self) -> None:
+        self._view.release()
+        self._map.close()
+
+
+def default_snapshot_path() -> Path:
+    path = db_path()
+    return path.with_name(path.name + SNAPSHOT_SUFFIX)
+
+
+def write_snapshot(path: Path, rows: Iterable[tuple], bank_version: int) -> int:
+    records = bytearray()
+    strings = bytearray()
+    count = 0
+    for question_id, stage, correct_choice, *texts in rows:
+        spans = []
+        for value in texts:
+            encoded = (value or "").encode("utf-8")
+            spans.extend((len(strings), len(encoded)))
+            strings += encoded
+        records += RECORD.pack(question_id, stage, correct_choice.encode("ascii"), *spans)
+        count += 1
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with temporary.open("wb") as handle:
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, bank_version, count))
+        handle.write(records)
+        handle.write(strings)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    return count
+
+
+def build_snapshot(path: Path) -> QuestionSnapshot:
+    columns = [Question.id, Question.stage, Question.correct_choice]
+    columns += [getattr(Question, name) for name in TEXT_FIELDS]
+    with get_engine().connect() as connection:
+        while True:
+            bank_version = question_bank_version(connection)
+            rows = connection.execute(select(*columns).order_by(Question.id)).all()
+            if question_bank_version(connection) == bank_version:
+                break
+    write_snapshot(path, rows, bank_version)
+    return QuestionSnapshot(path)
+
+
+def load_snapshot(path: Path | None = None) -> QuestionSnapshot:
+    path = path or default_snapshot_path()
+    with get_engine().connect() as connection:
+        current = question_bank_version(connection)
+    if path.exists():
+        try:
+            snapshot = QuestionSnapshot(path)
+        except ValueError:
+            snapshot = None
+        if snapshot is not None:
+            if snapshot.bank_version == current:
+                return snapshot
+            snapshot.close()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return build_snapshot(path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Génère l'instantané binaire des questions")
+    parser.add_argument("--db", help="Chemin de la base SQLite")
+    parser.add_argument(
+        "--engine-profile", choices=list(ENGINE_PROFILES), help="Réglages SQLite à appliquer"
+    )
+    parser.add_argument("--output", type=Path, help="Fichier à écrire")
+    args = parser.parse_args(argv)
+    if args.db or args.engine_profile:
+        configure_database(args.db, args.engine_profile)
+    init_db()
+    path = args.output or default_snapshot_path()
+    snapshot = build_snapshot(path)
+    print(f"{len(snapshot)} questions écrites dans {path} (version {snapshot.bank_version})")
+    snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
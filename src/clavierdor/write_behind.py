@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.dialects.sqlite import Insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import (
+    AnswerLog,
+    GameSession,
+    LeaderboardWindow,
+    PeriodBestScore,
+    PlayerBestScore,
+    leaderboard_bucket,
+)
+from .orm import get_engine
+
+SESSION_COLUMNS = (
+    "stage",
+    "score",
+    "streak",
+    "completed",
+    "correct_answers",
+    "total_answers",
+    "current_question_id",
+)
+
+
+class Durability(str, Enum):
+    BUFFERED = "buffered"
+    FULL = "full"
+
+
+def best_score_upsert() -> Insert:
+    statement = sqlite_insert(PlayerBestScore)
+    return statement.on_conflict_do_update(
+        index_elements=[PlayerBestScore.player_id],
+        set_={
+            "session_id": statement.excluded.session_id,
+            "score": statement.excluded.score,
+            "started_at": statement.excluded.started_at,
+        },
+        where=(statement.excluded.score > PlayerBestScore.score)
+        | (statement.excluded.session_id == PlayerBestScore.session_id),
+    )
+
+
+def period_best_upsert() -> Insert:
+    statement = sqlite_insert(PeriodBestScore)
+    return statement.on_conflict_do_update(
+        index_elements=[PeriodBestScore.window, PeriodBestScore.bucket, PeriodBestScore.player_id],
+        set_={
+            "session_id": statement.excluded.session_id,
+            "score": statement.excluded.score,
+            "started_at": statement.excluded.started_at,
+        },
+        where=(statement.excluded.score > PeriodBestScore.score)
+        | (statement.excluded.session_id == PeriodBestScore.session_id),
+    )
+
+
+def period_best_rows(best_scores: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [
+        {**best, "window": window, "bucket": leaderboard_bucket(window, best["started_at"])}
+        for best in best_scores
+        for window in LeaderboardWindow
+    ]
+
+
+@dataclass
+class PendingAnswer:
+    sequence: int
+    session_id: int
+    session_values: dict[str, Any]
+    answer: dict[str, Any]
+    best_score: dict[str, Any] | None
+    done: Future = field(default_factory=Future)
+
+
+class WriteBehindLog:
+    def __init__(
+        self,
+        max_batch: int = 256,
+        max_delay_ms: float = 20.0,
+        durability: Durability = Durability.BUFFERED,
+        retries: int = 3,
+        retry_delay_ms: float = 50.0,
+    ) -> None:
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.durability = durability
+        self.retries = retries
+        self.retry_delay = retry_delay_ms / 1000
+        self._condition = threading.Condition()
+        self._pending: list[PendingAnswer] = []
+        self._overlay: dict[int, PendingAnswer] = {}
+        self._sequence = 0
+        self._in_flight = 0
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="clavierdor-write-behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(
+        self,
+        session_id: int,
+        session_values: dict[str, Any],
+        answer: dict[str, Any],
+        best_score: dict[str, Any] | None,
+    ) -> Future:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Journal d'écriture différée fermé")
+            self._sequence += 1
+            entry = PendingAnswer(self._sequence, session_id, session_values, answer, best_score)
+            self._pending.append(entry)
+            self._overlay[session_id] = entry
+            self._condition.notify_all()
+        return entry.done
+
+    def pending_values(self, session_id: int) -> dict[str, Any] | None:
+        with self._condition:
+            entry = self._overlay.get(session_id)
+            return dict(entry.session_values) if entry else None
+
+    def flush(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: not self._pending and not self._in_flight)
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending and self._closed:
+                    return
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+                self._in_flight = len(batch)
+            failed = self._write_with_retry(batch)
+            with self._condition:
+                for entry in batch:
+                    if self._overlay.get(entry.session_id) is entry:
+                        del self._overlay[entry.session_id]
+                    error = failed.get(entry.sequence)
+                    if error is None:
+                        entry.done.set_result(None)
+                    else:
+                        entry.done.set_exception(error)
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _write_with_retry(self, batch: list[PendingAnswer]) -> dict[int, Exception]:
+        for attempt in range(self.retries):
+            try:
+                self._write(batch)
+            except Exception:  # noqa: BLE001
+                time.sleep(self.retry_delay * 2**attempt)
+            else:
+                return {}
+        failed: dict[int, Exception] = {}
+        broken: dict[int, Exception] = {}
+        for entry in batch:
+            error = broken.get(entry.session_id)
+            if error is None:
+                try:
+                    self._write([entry])
+                except Exception as exc:  # noqa: BLE001
+                    error = broken[entry.session_id] = exc
+                else:
+                    continue
+            failed[entry.sequence] = error
+        return failed
+
+    def _write(self, batch: list[PendingAnswer]) -> None:
+        latest: dict[int, PendingAnswer] = {}
+        best_scores: dict[int, dict[str, Any]] = {}
+        period_scores: dict[int, dict[str, Any]] = {}
+        for entry in batch:
+            latest[entry.session_id] = entry
+            best = entry.best_score
+            if best is not None:
+                current = best_scores.get(best["player_id"])
+                if current is None or best["score"] > current["score"]:
+                    best_scores[best["player_id"]] = best
+                current = period_scores.get(entry.session_id)
+                if current is None or best["score"] > current["score"]:
+                    period_scores[entry.session_id] = best
+        session_updates = []
+        for session_id, entry in latest.items():
+            values = {f"new_{column}": value for column, value in entry.session_values.items()}
+            session_updates.append({"session_id": session_id, **values})
+        with get_engine().begin() as connection:
+            connection.execute(insert(AnswerLog), [entry.answer for entry in batch])
+            connection.execute(
+                update(GameSession)
+                .where(GameSession.id == bindparam("session_id"))
+                .values({column: bindparam(f"new_{column}") for column in SESSION_COLUMNS}),
+                session_updates,
+            )
+            if best_scores:
+                connection.execute(best_score_upsert(), list(best_scores.values()))
+                connection.execute(period_best_upsert(), period_best_rows(period_scores.values()))
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from clavierdor.orm import configure_database
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> Iterator[Path]:
+    path = tmp_path / "clavierdor.db"
+    configure_database(path)
+    yield path
+    configure_database(None)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from sqlalchemy import delete, text
+
+from clavierdor.analytics import refresh_statistics
+from clavierdor.models import AnswerLog, RoleType
+from clavierdor.orm import SCHEMA_VERSION, get_engine, init_db
+from clavierdor.services import GameService, SessionState
+
+
+def _answer(service: GameService, state: SessionState) -> SessionState:
+    question = state.current_question
+    assert question is not None
+    return service.submit_answer(state.session_id, question.id, question.correct_choice)
+
+
+def test_deleted_answers_do_not_hide_new_ones(database: Path) -> None:
+    service = GameService()
+    try:
+        state = service.start_new_game("Ada", RoleType.FRONT)
+        for _ in range(3):
+            state = _answer(service, state)
+        assert refresh_statistics().last_answer_id == 3
+        with get_engine().begin() as connection:
+            connection.execute(delete(AnswerLog).where(AnswerLog.id > 1))
+        _answer(service, state)
+    finally:
+        service.close()
+    report = refresh_statistics()
+    assert (report.processed, report.last_answer_id) == (1, 4)
+
+
+def test_migration_adds_autoincrement(database: Path) -> None:
+    service = GameService()
+    try:
+        state = service.start_new_game("Ada", RoleType.FRONT)
+        _answer(service, _answer(service, state))
+    finally:
+        service.close()
+    refresh_statistics()
+    with get_engine().begin() as connection:
+        definition = connection.scalar(
+            text("SELECT sql FROM sqlite_master WHERE name = 'answer_logs'")
+        )
+        connection.execute(text("ALTER TABLE answer_logs RENAME TO answer_logs_copy"))
+        connection.execute(text("DROP INDEX ix_answer_logs_session_answered"))
+        connection.execute(text(definition.replace(" AUTOINCREMENT", "")))
+        connection.execute(text("INSERT INTO answer_logs SELECT * FROM answer_logs_copy"))
+        connection.execute(text("DROP TABLE answer_logs_copy"))
+        connection.execute(text("DELETE FROM answer_logs WHERE id = 2"))
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+    assert init_db()
+    with get_engine().connect() as connection:
+        definition = connection.scalar(
+            text("SELECT sql FROM sqlite_master WHERE name = 'answer_logs'")
+        )
+        sequence = connection.scalar(
+            text("SELECT seq FROM sqlite_sequence WHERE name = 'answer_logs'")
+        )
+        count = connection.scalar(text("SELECT count(*) FROM answer_logs"))
+        index = connection.scalar(
+            text("SELECT name FROM sqlite_master WHERE tbl_name = 'answer_logs' AND type = 'index'")
+        )
+    assert "AUTOINCREMENT" in definition
+    assert (sequence, count, index) == (2, 1, "ix_answer_logs_session_answered")
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from collections.abc import Collection
+from pathlib import Path
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from clavierdor import core
+from clavierdor.core import GameCore
+from clavierdor.data import seed_questions
+from clavierdor.models import Question
+from clavierdor.orm import get_session, init_db
+
+
+def _stage_ids(game: GameCore) -> dict[int, list[int]]:
+    return {
+        stage: [question.id for question in questions]
+        for stage, questions in sorted(game._questions_by_stage.items())
+    }
+
+
+def test_incremental_reload_matches_full_load(
+    database: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    init_db(seed_questions)
+    game = GameCore()
+    game.ensure_questions_loaded()
+    with get_session() as session:
+        first, second = session.scalars(select(Question.id).order_by(Question.id).limit(2))
+        session.execute(update(Question).where(Question.id == first).values(stage=3))
+        session.execute(delete(Question).where(Question.id == second))
+        session.add(
+            Question(
+                prompt="Nouvelle question",
+                choice_a="A",
+                choice_b="B",
+                choice_c="C",
+                choice_d="D",
+                correct_choice="A",
+                stage=2,
+            )
+        )
+        session.commit()
+    requested: list[Collection[int] | None] = []
+
+    def difficulties(question_ids: Collection[int] | None = None) -> dict:
+        requested.append(question_ids)
+        return {}
+
+    monkeypatch.setattr(core, "question_difficulties", difficulties)
+    game._refresh_questions()
+    assert len(requested) == 1 and len(requested[0] or ()) == 3
+    full = GameCore()
+    full.ensure_questions_loaded()
+    assert _stage_ids(game) == _stage_ids(full)
+    assert game._questions_by_id.keys() == full._questions_by_id.keys()
+    for stage, questions in game._questions_by_stage.items():
+        assert game._selector._decks[stage].questions == questions
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from clavierdor.exports import export_scores
+
+SCORES = [("Ada", 120, datetime(2024, 1, 15, 10, 30))]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_text_exports_ignore_title(tmp_path: Path, fmt: str) -> None:
+    plain = export_scores(tmp_path / f"plain.{fmt}", SCORES)
+    titled = export_scores(tmp_path / f"titled.{fmt}", SCORES, title="Semaine 3")
+    assert plain.read_bytes() == titled.read_bytes()
+
+
+def test_jsonl_export(tmp_path: Path) -> None:
+    path = export_scores(tmp_path / "scores.jsonl", SCORES)
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert records == [{"joueur": "Ada", "score": 120, "date": "2024-01-15T10:30:00"}]
+
+
+def test_pdf_export_uses_title(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pdf_export = pytest.importorskip("clavierdor.pdf_export")
+    headings: list[str] = []
+    header = pdf_export.ScoresPDF.header
+
+    def record_heading(pdf: pdf_export.ScoresPDF) -> None:
+        headings.append(pdf.heading)
+        header(pdf)
+
+    monkeypatch.setattr(pdf_export.ScoresPDF, "header", record_heading)
+    export_scores(tmp_path / "default.pdf", SCORES)
+    export_scores(tmp_path / "week.pdf", SCORES, title="Semaine 3")
+    assert headings == [pdf_export.DEFAULT_TITLE, "Semaine 3"]
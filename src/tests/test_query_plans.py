@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Select
+
+from benchmarks.query_plans import HOT_QUERIES, plan_failures
+from clavierdor.data import seed_questions
+from clavierdor.orm import get_engine, init_db
+
+
+@pytest.mark.parametrize(("name", "query"), HOT_QUERIES.items(), ids=list(HOT_QUERIES))
+def test_hot_query_uses_its_index(
+    database: Path, name: str, query: tuple[Select, str]
+) -> None:
+    init_db(seed_questions)
+    statement, index_name = query
+    with get_engine().connect() as connection:
+        assert plan_failures(connection, name, statement, index_name) == []
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from clavierdor.models import RoleType
+from clavierdor.server import GameServer
+from clavierdor.services import GameService
+
+
+@pytest.fixture
+def server(database: Path) -> Iterator[GameServer]:
+    with GameServer(("127.0.0.1", 0), GameService(), workers=2) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+
+
+def _post(server: GameServer, path: str, payload: dict[str, Any]) -> tuple[int, Any]:
+    request = Request(
+        f"http://127.0.0.1:{server.server_port}{path}",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_state_hides_answer_and_hint(server: GameServer) -> None:
+    status, state = _post(server, "/games", {"name": "Ada", "role": RoleType.FRONT.value})
+    assert status == 200
+    question = state["current_question"]
+    assert set(question) == {"id", "prompt", "choices", "stage"}
+    assert "correct_choice" not in json.dumps(state)
+    assert "hint" not in json.dumps(state)
+
+
+def test_invalid_request_is_400(server: GameServer) -> None:
+    status, body = _post(server, "/games", {"name": "Ada", "role": "Inconnu"})
+    assert status == 400
+    assert body == {"error": "Rôle inconnu"}
+
+
+def test_unknown_session_is_404(server: GameServer) -> None:
+    status, _ = _post(server, "/games/999999/jokers/back", {})
+    assert status == 404
+
+
+def test_service_value_error_is_500(server: GameServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    def broken(name: str, role: Any) -> None:
+        raise ValueError("bogue")
+
+    monkeypatch.setattr(server.service, "start_new_game", broken)
+    server.handle_error = lambda request, client_address: None
+    status, body = _post(server, "/games", {"name": "Ada", "role": RoleType.FRONT.value})
+    assert status == 500
+    assert body == {"error": "Erreur interne"}
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from sqlalchemy import update
+
+from clavierdor.core import GameCore
+from clavierdor.data import seed_questions
+from clavierdor.models import Question
+from clavierdor.orm import get_session, init_db
+from clavierdor.snapshot import QuestionSnapshot, write_snapshot
+
+
+def test_snapshot_keeps_large_stages(tmp_path: Path) -> None:
+    path = tmp_path / "questions.bin"
+    rows = [(7, 300, "C", "Question", "a", "b", "c", "d", "Indice")]
+    write_snapshot(path, rows, bank_version=5)
+    snapshot = QuestionSnapshot(path)
+    try:
+        (question,) = snapshot.questions()
+        assert (question.id, question.stage, question.correct_choice) == (7, 300, "C")
+        assert (question.prompt, question.choice_c, question.hint) == ("Question", "c", "Indice")
+    finally:
+        snapshot.close()
+
+
+def test_full_reload_closes_previous_snapshot(database: Path) -> None:
+    init_db(seed_questions)
+    game = GameCore(question_snapshot=database.with_name("questions.bin"))
+    game.ensure_questions_loaded()
+    previous = game._snapshot
+    assert previous is not None
+    with get_session() as session:
+        session.execute(update(Question).values(hint="Nouvel indice"))
+        session.commit()
+    game._load_questions()
+    assert game._snapshot is not previous
+    assert previous._map.closed
+    question = next(iter(game._questions_by_id.values()))
+    assert game._question_view(question).hint == "Nouvel indice"
+    game.close()
+    assert game._snapshot._map.closed
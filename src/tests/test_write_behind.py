@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from clavierdor.write_behind import PendingAnswer, WriteBehindLog
+
+
+def test_failed_entry_fails_later_entries_of_its_session(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    written: list[int] = []
+
+    def write(self: WriteBehindLog, batch: list[PendingAnswer]) -> None:
+        if any(entry.answer["id"] == 1 for entry in batch):
+            raise RuntimeError("disque plein")
+        written.extend(entry.answer["id"] for entry in batch)
+
+    monkeypatch.setattr(WriteBehindLog, "_write", write)
+    log = WriteBehindLog(max_batch=4, max_delay_ms=1000, retries=1, retry_delay_ms=0)
+    try:
+        futures = [
+            log.submit(session_id, {}, {"id": answer_id}, None)
+            for session_id, answer_id in ((10, 1), (20, 2), (10, 3), (20, 4))
+        ]
+        log.flush()
+    finally:
+        log.close()
+    assert written == [2, 4]
+    assert [future.exception() is None for future in futures] == [False, True, False, True]